@@ -30,7 +30,7 @@ config = PluginConfig(
     task=TaskConfig(
         trigger=trigger.TriggerConfig(
             type=trigger.SCHEDULE,
-            interval=datetime.timedelta(days=1),    # Интервал перезапуска плагина
+            interval=datetime.timedelta(hours=1),    # Интервал перезапуска плагина. Запуски без ожидаемых публикаций пропускаются (`adaptive_schedule`)
         )
     ),
     middleware=MiddlewareConfig(
@@ -47,7 +47,27 @@ config = PluginConfig(
             method='content',
             params=[
                 payload.entry.ModuleParamConfig('web_driver', WebDriver, True),
-                payload.entry.ConstParamConfig('use_rss', 1)
+                payload.entry.ConstParamConfig('use_rss', 1),
+                payload.entry.ConstParamConfig('use_http', 1),
+                payload.entry.ConstParamConfig('concurrency', 8),
+                payload.entry.ConstParamConfig('state_dir', 's3p_plugin_parser_ecb'),
+                payload.entry.ConstParamConfig('wait_timeouts', {'consent': 2, 'lazy_load': 3}),
+                payload.entry.ConstParamConfig('use_fragments', 1),
+                payload.entry.ConstParamConfig('years', [2026, 2025, 2024]),
+                payload.entry.ConstParamConfig('extract_documents', 1),
+                payload.entry.ConstParamConfig('document_limits', {'max_bytes': 50 * 1024 * 1024, 'timeout': 120, 'processes': 2}),
+                payload.entry.ConstParamConfig('seen_ttl_days', 365),
+                payload.entry.ConstParamConfig('lean_page_load', 1),
+                payload.entry.ConstParamConfig('browser_tabs', 4),
+                payload.entry.ConstParamConfig('metrics_path', 's3p_plugin_parser_ecb/ecb.prom'),
+                payload.entry.ConstParamConfig('use_async', 1),
+                payload.entry.ConstParamConfig('stream_buffer', 16),
+                payload.entry.ConstParamConfig('request_policy', {'rate': 8, 'burst': 16, 'retries': 3, 'breaker': 10}),
+                payload.entry.ConstParamConfig('http_pool', {'pool_size': 8, 'dns_ttl': 300}),
+                payload.entry.ConstParamConfig('resume_backfill', 1),
+                payload.entry.ConstParamConfig('backfill', {}),
+                payload.entry.ConstParamConfig('adaptive_schedule', {'min_expected': 0.5, 'max_interval_hours': 24}),
+                payload.entry.ConstParamConfig('revalidate', {}),
             ] # Подробнее можно почитать [тут](./readme.md#пример-конфигурации-параметров-запуска-плагина
         )
     )
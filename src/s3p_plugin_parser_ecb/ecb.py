@@ -1,18 +1,2005 @@
+import collections
+import contextlib
+import dataclasses
 import datetime
+import functools
+import hashlib
+import http.client
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import socket
+import sqlite3
+import statistics
+import tempfile
+import threading
 import time
-from typing import Iterator
+from urllib.parse import urljoin, urlsplit, urlunsplit
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Iterable, Iterator, Mapping, TypeVar
 
-import feedparser
 from s3p_sdk.plugin.payloads.parsers import S3PParserBase
-from s3p_sdk.exceptions.parser import S3PPluginParserOutOfRestrictionException, S3PPluginParserFinish
+from s3p_sdk.exceptions.parser import S3PPluginParserOutOfRestrictionException, S3PPluginParserFinish, S3PPluginPayloadError
 from s3p_sdk.types import S3PRefer, S3PDocument, S3PPlugin, S3PPluginRestrictions
-from selenium.webdriver.chrome.webdriver import WebDriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as ec
-from selenium.webdriver.support.ui import WebDriverWait
 from s3p_sdk.types.plugin_restrictions import FROM_DATE
-import dateutil.parser
-from bs4 import BeautifulSoup
+
+# Файл загружается заново для каждой задачи. Тяжелые зависимости (selenium, bs4, dateutil, asyncio,
+# multiprocessing) импортируются внутри функций, когда выбранный режим работы действительно их использует
+if TYPE_CHECKING:
+    from selenium.webdriver.chrome.webdriver import WebDriver
+
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') is not None else 'html.parser'
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+# Теги, после которых браузер переносит строку. Нужны, чтобы текст из HTML совпадал с `WebElement.text`
+_BLOCK_TAGS = frozenset((
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure', 'footer',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'ol', 'p', 'pre', 'section', 'table', 'tr',
+    'ul',
+))
+_SKIP_TAGS = frozenset(('script', 'style', 'noscript', 'template'))
+_MONTHS = {name: number for number, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1,
+)}
+
+
+@dataclasses.dataclass
+class ECBArticle:
+    """
+    Fields of an ECB publication page. Missing fields are None.
+    """
+    title: str | None
+    category: str | None
+    published: datetime.datetime | None
+    abstract: str | None
+    text: str | None
+
+
+def element_text(element) -> str:
+    """
+    Rendered-like text of a BeautifulSoup element (close to selenium `WebElement.text`)
+    """
+    from bs4 import NavigableString, Comment
+
+    parts = []
+    for node in element.descendants:
+        if isinstance(node, NavigableString):
+            if isinstance(node, Comment) or node.parent.name in _SKIP_TAGS:
+                continue
+            parts.append(str(node))
+        elif node.name in _BLOCK_TAGS:
+            parts.append('\0')
+    return rendered_text(parts)
+
+
+def rendered_text(parts: Iterable[str]) -> str:
+    """
+    Joins the text nodes like a browser renders them. A NUL character marks the start of a block element
+    """
+    # Внутри текста пробелы схлопываются как в браузере, переносы строк ставятся только на границах блоков
+    lines = (re.sub(r'\s+', ' ', line).strip() for line in ''.join(parts).split('\0'))
+    return '\n'.join(line for line in lines if line)
+
+
+def parse_article(html: str | bytes) -> ECBArticle | None:
+    """
+    Extracts the publication fields from a server-rendered ECB page.
+
+    :return: ECBArticle or None when the page has no `main` element with a `.section` block
+    """
+    from bs4 import BeautifulSoup
+    import dateutil.parser
+
+    soup = BeautifulSoup(html, HTML_PARSER)
+    main = soup.find('main')
+    if main is None:
+        return None
+    section = main.find(class_='section')
+    if section is None:
+        return None
+
+    title = main.select_one('div.title h1')
+    category = main.select_one('div.title ul li')
+    pub_date = main.find(class_='ecb-publicationDate')
+    abstract = section.find('ul')
+    footnotes = soup.find(class_='footnotes')
+
+    published = None
+    if pub_date is not None:
+        try:
+            published = dateutil.parser.parse(element_text(pub_date))
+        except (ValueError, OverflowError):
+            published = None
+
+    text = element_text(section)
+    if footnotes is not None:
+        text += '\n\n' + element_text(footnotes)
+
+    return ECBArticle(
+        title=element_text(title) if title is not None else None,
+        category=element_text(category) if category is not None else None,
+        published=published,
+        abstract=element_text(abstract) if abstract is not None else None,
+        text=text,
+    )
+
+
+class TransportResponse:
+    """
+    Response of `HttpTransport`. `read` returns the decoded body, `close` gives the connection back to the pool
+    when the body was read to the end
+    """
+
+    def __init__(self, transport: 'HttpTransport', key: tuple[str, str, int], connection: http.client.HTTPConnection,
+                 raw: http.client.HTTPResponse, url: str):
+        self.url = url
+        self.status = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+        self._transport = transport
+        self._key = key
+        self._connection = connection
+        self._raw = raw
+        self._decode, self._flush = transport.decoder(raw.headers.get('Content-Encoding'))
+        self._flushed = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            return self._decode(self._raw.read()) + self._tail()
+        while chunk := self._raw.read(size):
+            # Сжатый фрагмент может не дать ни одного байта текста, тогда читается следующий
+            if data := self._decode(chunk):
+                return data
+        return self._tail()
+
+    def _tail(self) -> bytes:
+        if self._flushed:
+            return b''
+        self._flushed = True
+        return self._flush()
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        if self._raw.isclosed() and not self._raw.will_close:
+            self._transport.release(self._key, connection)
+        else:
+            self._raw.close()
+            connection.close()
+
+    def __enter__(self) -> 'TransportResponse':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class HttpTransport:
+    """
+    HTTP client of a parser run, shared by the feed, the publication pages, the index fragments and the documents.
+
+    Keeps idle keep-alive connections per host (no more than `pool_size` of them), resolves a host once per `dns_ttl`
+    seconds (the addresses are tried in turn, as `socket.create_connection` does) and requests compressed responses
+    (gzip, deflate, and br when `brotli` is installed). The proxies of the environment (`urllib.request.getproxies`)
+    are used as in `urllib`: plain HTTP goes through the proxy, HTTPS through a `CONNECT` tunnel.
+    Errors follow `urllib`: a status other than 2xx raises `urllib.error.HTTPError`, redirects are followed.
+    """
+
+    OPTIONS = {
+        'pool_size': 8,   # сколько свободных соединений с одним хостом остаются открытыми
+        'dns_ttl': 300,   # сколько секунд используется адрес хоста, полученный из DNS
+    }
+    ENCODINGS = ('gzip', 'deflate', 'br') if importlib.util.find_spec('brotli') is not None else ('gzip', 'deflate')
+    MAX_REDIRECTS = 5
+
+    _shared: 'HttpTransport | None' = None
+
+    def __init__(self, options: dict | None = None):
+        self.options = {**self.OPTIONS, **(options or {})}
+        self._lock = threading.Lock()
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = collections.defaultdict(list)
+        self._addresses: dict[tuple[str, int], tuple[list[tuple[str, int]], float]] = {}
+        self._proxies: dict[str, str] | None = None
+        self.counters: collections.Counter[str] = collections.Counter(requests=0, connections=0, reused=0)
+
+    @classmethod
+    def shared(cls) -> 'HttpTransport':
+        """Transport of the downloads made outside of a parser run"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def get(self, url: str, headers: dict[str, str] | None = None, timeout: float = 30) -> TransportResponse:
+        for _ in range(self.MAX_REDIRECTS + 1):
+            response = self._request(url, headers or {}, timeout)
+            location = response.headers.get('Location')
+            if response.status in (301, 302, 303, 307, 308) and location:
+                self._discard(response)
+                url = urljoin(url, location)
+                continue
+            if not 200 <= response.status < 300:
+                import urllib.error
+
+                self._discard(response)
+                raise urllib.error.HTTPError(url, response.status, response.reason, response.headers, None)
+            return response
+        raise http.client.HTTPException(f'{url}: more than {self.MAX_REDIRECTS} redirects')
+
+    def _request(self, url: str, headers: dict[str, str], timeout: float) -> TransportResponse:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {
+            'User-Agent': USER_AGENT, 'Accept-Language': 'en', 'Accept-Encoding': ', '.join(self.ENCODINGS), **headers,
+        }
+        proxy = self._proxy(parts.scheme, parts.hostname)
+        if proxy is not None and parts.scheme == 'http':
+            # Прокси получает запрос с полным адресом ресурса
+            target = urlunsplit((parts.scheme, parts.netloc, target, '', ''))
+            headers.update(proxy[2])
+        while True:
+            connection, reused = self._connection(key, timeout, proxy)
+            try:
+                connection.request('GET', target, headers=headers)
+                raw = connection.getresponse()
+            except ConnectionError:
+                connection.close()
+                # Сервер закрыл свободное соединение: запрос повторяется в новом
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                connection.close()
+                raise
+            with self._lock:
+                self.counters['requests'] += 1
+            return TransportResponse(self, key, connection, raw, url)
+
+    def _connection(self, key: tuple[str, str, int], timeout: float,
+                    proxy: tuple[str, int, dict[str, str]] | None = None) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                connection = idle.pop()
+                self.counters['reused'] += 1
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                return connection, True
+            self.counters['connections'] += 1
+
+        scheme, host, port = key
+        factory = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        if proxy is None:
+            connection = factory(host, port, timeout=timeout)
+            peer = (host, port)
+        else:
+            connection = factory(proxy[0], proxy[1], timeout=timeout)
+            peer = proxy[:2]
+            if scheme == 'https':
+                connection.set_tunnel(host, port, headers=proxy[2])
+        # Соединение открывается по адресам из кэша DNS, а `Host` и имя сервера TLS остаются прежними
+        connection._create_connection = lambda _, *args, **kwargs: self._connect(*peer, *args, **kwargs)
+        return connection, False
+
+    def _connect(self, host: str, port: int, *args, **kwargs) -> socket.socket:
+        addresses = self._resolve(host, port)
+        for address in addresses:
+            try:
+                return socket.create_connection(address, *args, **kwargs)
+            except OSError:
+                if address is addresses[-1]:
+                    # Ни один адрес не отвечает: следующее соединение снова обратится к DNS
+                    with self._lock:
+                        self._addresses.pop((host, port), None)
+                    raise
+
+    def _resolve(self, host: str, port: int) -> list[tuple[str, int]]:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._addresses.get((host, port))
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        addresses = list(dict.fromkeys((info[4][0], port) for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)))
+        with self._lock:
+            self._addresses[(host, port)] = (addresses, now + self.options['dns_ttl'])
+        return addresses
+
+    def _proxy(self, scheme: str, host: str) -> tuple[str, int, dict[str, str]] | None:
+        """Proxy of the environment for the host: `(host, port, headers)`, None for a direct connection"""
+        import urllib.request
+
+        if self._proxies is None:
+            self._proxies = urllib.request.getproxies()
+        proxy = self._proxies.get(scheme)
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        parts = urlsplit(proxy if '://' in proxy else 'http://' + proxy)
+        headers = {}
+        if parts.username is not None:
+            import base64
+            from urllib.parse import unquote
+
+            credentials = f'{unquote(parts.username)}:{unquote(parts.password or "")}'
+            headers['Proxy-Authorization'] = 'Basic ' + base64.b64encode(credentials.encode()).decode()
+        return parts.hostname, parts.port or 80, headers
+
+    def release(self, key: tuple[str, str, int], connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.options['pool_size']:
+                idle.append(connection)
+                return
+        connection.close()
+
+    @staticmethod
+    def _discard(response: TransportResponse) -> None:
+        # Небольшое тело ответа дочитывается, чтобы соединение вернулось в пул
+        if int(response.headers.get('Content-Length') or 0) <= 64 * 1024:
+            try:
+                response.read()
+            except (OSError, http.client.HTTPException):
+                pass
+        response.close()
+
+    @staticmethod
+    def decoder(encoding: str | None) -> tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+        """Incremental decoder of the `Content-Encoding`: `(decode, flush)`"""
+        encoding = (encoding or 'identity').strip().lower()
+        if encoding in ('gzip', 'x-gzip', 'deflate'):
+            import zlib
+
+            # Заголовок gzip или zlib определяется автоматически
+            decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+            return decompressor.decompress, decompressor.flush
+        if encoding == 'br':
+            import brotli
+
+            decompressor = brotli.Decompressor()
+            return decompressor.process, lambda: b''
+        return (lambda data: data), (lambda: b'')
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self.counters)
+
+    def close(self) -> None:
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle.clear()
+        for connection in connections:
+            connection.close()
+
+
+def http_get(url: str, timeout: float = 30, transport: HttpTransport | None = None) -> bytes:
+    """
+    Downloads the resource without a browser
+    """
+    with (transport or HttpTransport.shared()).get(url, timeout=timeout) as response:
+        return response.read()
+
+
+def http_download(url: str, file, max_bytes: int, timeout: float = 30, chunk_size: int = 64 * 1024,
+                  transport: HttpTransport | None = None) -> int:
+    """
+    Streams the resource into the binary `file` without keeping it in memory.
+
+    :raises ValueError: when the resource is larger than `max_bytes`
+    :return: number of downloaded bytes
+    """
+    with (transport or HttpTransport.shared()).get(url, timeout=timeout) as response:
+        length = response.headers.get('Content-Length')
+        if length is not None and not response.headers.get('Content-Encoding') and int(length) > max_bytes:
+            raise ValueError(f'{url} is larger than {max_bytes} bytes ({length})')
+        size = 0
+        while chunk := response.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise ValueError(f'{url} is larger than {max_bytes} bytes')
+            file.write(chunk)
+        return size
+
+
+class CircuitOpen(ConnectionError):
+    """
+    Too many requests to the site failed in a row, the site is considered degraded
+    """
+
+
+def interruption_errors() -> tuple[type[Exception], ...]:
+    """
+    Errors that interrupt a crawl without being a defect of the parser: network errors (`URLError` included),
+    broken HTTP responses and the loss of the web driver session
+    """
+    from selenium.common.exceptions import WebDriverException
+
+    return OSError, http.client.HTTPException, WebDriverException
+
+
+class RequestGovernor:
+    """
+    Shared policy of the HTTP requests: a token bucket per host, retries with jittered exponential backoff
+    for the retryable errors (network errors, timeouts, 429 and 5xx) and a circuit breaker.
+
+    The breaker opens after `breaker` requests in a row failed all their attempts.
+    After that every request raises `CircuitOpen` without touching the site.
+    Page loads of the web driver follow the same policy: through `call`, or `wait` and `report` for the browser tabs.
+    """
+
+    POLICY = {
+        'rate': 0,             # запросов в секунду к одному хосту, 0 - без ограничения
+        'burst': 10,           # сколько запросов к хосту можно сделать подряд без ожидания
+        'retries': 3,          # повторы запроса после ошибки, которую можно повторить
+        'backoff': 0.5,        # пауза перед первым повтором (секунды), дальше удваивается со случайным разбросом
+        'max_backoff': 30,     # наибольшая пауза. Если сервер просит ждать дольше (Retry-After), запрос не повторяется
+        'breaker': 10,         # столько запросов подряд не удалось - сайт считается недоступным. 0 - не проверяется
+    }
+
+    def __init__(self, policy: dict | None = None, stats: 'RunStats | None' = None):
+        self.policy = {**self.POLICY, **(policy or {})}
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._stats = stats or RunStats()
+        self._lock = threading.Lock()
+        self._buckets: dict[str, tuple[float, float]] = {}  # хост -> (токены, время обновления)
+        self._failures = 0
+        self.open = False
+
+    def call(self, url: str, func: Callable[..., R], *args, **kwargs) -> R:
+        """
+        Calls `func(*args, **kwargs)` that requests `url` under the policy
+        """
+        for attempt in itertools.count():
+            self.wait(url)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._failed(url, e, attempt)
+                if delay is None:
+                    raise
+                with self._stats.stage('retry'):
+                    time.sleep(delay)
+                continue
+            self._succeeded()
+            return result
+
+    async def acall(self, url: str, func: Callable[[], Awaitable[R]]) -> R:
+        """
+        Asynchronous counterpart of `call`: awaits `func()` under the policy
+        """
+        import asyncio
+
+        for attempt in itertools.count():
+            self._check()
+            delay = self._reserve(url)
+            if delay:
+                with self._stats.stage('throttle'):
+                    await asyncio.sleep(delay)
+            try:
+                result = await func()
+            except Exception as e:
+                delay = self._failed(url, e, attempt)
+                if delay is None:
+                    raise
+                with self._stats.stage('retry'):
+                    await asyncio.sleep(delay)
+                continue
+            self._succeeded()
+            return result
+
+    def wait(self, url: str) -> None:
+        """
+        Checks the breaker and waits for a token of the host before a request made outside of `call`
+        """
+        self._check()
+        delay = self._reserve(url)
+        if delay:
+            with self._stats.stage('throttle'):
+                time.sleep(delay)
+
+    def report(self, url: str, error: Exception | None = None) -> None:
+        """
+        Outcome of a request made outside of `call`. A retryable error counts as a request that failed all its attempts
+        """
+        if error is None:
+            self._succeeded()
+        else:
+            self._failed(url, error, self.policy['retries'])
+
+    @staticmethod
+    def retry_after(error: BaseException) -> float | None:
+        """
+        None when the request must not be repeated, otherwise the delay requested by the server (Retry-After) or 0
+        """
+        # HTTPError из urllib (`code`) и ClientResponseError из aiohttp (`status`)
+        status = getattr(error, 'code', None) or getattr(error, 'status', None)
+        if isinstance(status, int):
+            if status != 429 and status < 500:
+                return None
+            try:
+                return float((getattr(error, 'headers', None) or {}).get('Retry-After') or 0)
+            except (TypeError, ValueError):
+                return 0.0
+        if isinstance(error, (OSError, http.client.HTTPException)):
+            # URLError, таймауты и разрывы соединения
+            return 0.0
+        # Ошибки соединения aiohttp и страница, не загрузившаяся в браузере (TimeoutException из selenium)
+        if any(cls.__name__ in ('ClientConnectionError', 'ClientPayloadError', 'TimeoutException') for cls in type(error).__mro__):
+            return 0.0
+        return None
+
+    def _check(self) -> None:
+        if self.open:
+            raise CircuitOpen(f'Requests are stopped after {self._failures} failed requests in a row')
+
+    def _reserve(self, url: str) -> float:
+        """
+        Takes a token of the host. The tokens may go below zero, then the request waits until its token is refilled
+        """
+        rate = self.policy['rate']
+        if not rate:
+            return 0
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(host, (self.policy['burst'], now))
+            tokens = min(self.policy['burst'], tokens + (now - updated) * rate) - 1
+            self._buckets[host] = (tokens, now)
+        return -tokens / rate if tokens < 0 else 0
+
+    def _failed(self, url: str, error: Exception, attempt: int) -> float | None:
+        """
+        :return: delay before the next attempt or None when the error is raised
+        """
+        retry_after = self.retry_after(error)
+        if retry_after is None:
+            # Сервер ответил (например, 404): сайт работает
+            self._succeeded()
+            return None
+        delay = min(self.policy['max_backoff'], self.policy['backoff'] * 2 ** attempt) * random.uniform(0.5, 1.5)
+        if attempt < self.policy['retries'] and retry_after <= self.policy['max_backoff']:
+            self.logger.debug(f'Request {url} failed ({error}), attempt {attempt + 2} in {max(delay, retry_after):.1f} s')
+            return max(delay, retry_after)
+
+        with self._lock:
+            self._failures += 1
+            if self.policy['breaker'] and self._failures >= self.policy['breaker'] and not self.open:
+                self.open = True
+                self.logger.error(f'{self._failures} requests failed in a row, the site is considered degraded')
+        return None
+
+    def _succeeded(self) -> None:
+        with self._lock:
+            self._failures = 0
+
+
+# Код процесса, извлекающего текст PDF. Модуль плагина загружается по пути и не импортируется в процессах пула,
+# поэтому код воркера регистрируется как отдельный модуль и в родителе (для сериализации функции), и в каждом процессе
+_PDF_WORKER = '_s3p_ecb_pdf_worker'
+_PDF_WORKER_SOURCE = """
+def extract_text(path, max_chars):
+    from pypdf import PdfReader
+
+    parts = []
+    size = 0
+    for page in PdfReader(path).pages:
+        text = page.extract_text() or ''
+        parts.append(text.strip())
+        size += len(text)
+        if size >= max_chars:
+            break
+    return '\\n\\n'.join(part for part in parts if part)[:max_chars]
+"""
+# Инициализация процесса пула: модуль воркера и однократный импорт pypdf
+_PDF_WORKER_BOOT = f"""
+import sys, types
+
+module = types.ModuleType({_PDF_WORKER!r})
+exec({_PDF_WORKER_SOURCE!r}, module.__dict__)
+sys.modules[{_PDF_WORKER!r}] = module
+try:
+    import pypdf
+except ImportError:
+    pass
+"""
+
+
+def _pdf_worker():
+    """Module with the PDF worker function, registered in this process"""
+    import sys
+    import types
+
+    module = sys.modules.get(_PDF_WORKER)
+    if module is None:
+        module = types.ModuleType(_PDF_WORKER)
+        exec(_PDF_WORKER_SOURCE, module.__dict__)
+        sys.modules[_PDF_WORKER] = module
+    return module
+
+
+class DocumentExtractor:
+    """
+    Extracts the text of the document publications (PDF).
+
+    A document is streamed to a temporary file and parsed in a pool of worker processes (`forkserver` or `spawn`,
+    pypdf is imported once per process), so the parser neither holds whole files in memory nor is blocked
+    by a slow document. A worker that exceeds the timeout is killed together with its pool.
+    Every document is limited by its size (`max_bytes`), the extraction time (`timeout`, seconds)
+    and the text length (`max_chars`). No more than `processes` documents are processed at once.
+    """
+
+    LIMITS = {
+        'max_bytes': 50 * 1024 * 1024,
+        'timeout': 120,
+        'max_chars': 2_000_000,
+        'processes': 2,
+    }
+
+    def __init__(self, limits: dict | None = None, stats: 'RunStats | None' = None, governor: RequestGovernor | None = None,
+                 transport: HttpTransport | None = None):
+        self.limits = {**self.LIMITS, **(limits or {})}
+        self._stats = stats or RunStats()
+        self._governor = governor or RequestGovernor(stats=self._stats)
+        self._transport = transport or HttpTransport.shared()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._executor = ThreadPoolExecutor(max_workers=self.limits['processes'], thread_name_prefix='ecb-document')
+        # Пул процессов создается при первом документе и пересоздается, если его процессы убиты по таймауту.
+        # Процессы не наследуют потоки и блокировки парсера (fork из многопоточного процесса может зависнуть)
+        self._pool = None
+        self._pool_generation = 0
+        self._pool_lock = threading.Lock()
+
+    def submit(self, url: str) -> Future:
+        return self._executor.submit(self.extract, url)
+
+    def extract(self, url: str) -> str | None:
+        """
+        :return: text of the document or None when it could not be extracted
+        """
+        with tempfile.NamedTemporaryFile(suffix='.pdf') as file:
+            try:
+                with self._stats.stage('document'):
+                    self._stats.count('bytes', self._governor.call(url, self._download, url, file))
+                file.flush()
+                file.seek(0)
+                if file.read(5) != b'%PDF-':
+                    self.logger.debug(f'Document {url} is not a PDF file')
+                    return None
+            except Exception as e:
+                self.logger.error(f'Document {url} is not loaded: {e}')
+                return None
+            with self._stats.stage('pdf'):
+                return self._extract_text(url, file.name)
+
+    def _download(self, url: str, file) -> int:
+        # Повторная попытка начинает файл заново
+        file.seek(0)
+        file.truncate()
+        return http_download(url, file, self.limits['max_bytes'], transport=self._transport)
+
+    def _extract_text(self, url: str, path: str) -> str | None:
+        from concurrent.futures import TimeoutError
+        from concurrent.futures.process import BrokenProcessPool
+
+        # Вторая попытка - если пул сломан из-за другого документа (процесс убит по таймауту)
+        for attempt in range(2):
+            pool, generation = self._process_pool()
+            future = pool.submit(_pdf_worker().extract_text, path, self.limits['max_chars'])
+            try:
+                return future.result(timeout=self.limits['timeout']) or None
+            except TimeoutError:
+                self.logger.error(f'Text extraction of {url} exceeded {self.limits["timeout"]} seconds')
+                self._kill_pool(generation)
+                return None
+            except BrokenProcessPool as e:
+                self._kill_pool(generation)
+                if attempt:
+                    self.logger.error(f'Text extraction of {url} failed: worker process exited ({e})')
+            except Exception as e:
+                self.logger.error(f'Text extraction of {url} failed: {e!r}')
+                return None
+        return None
+
+    def _process_pool(self):
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        with self._pool_lock:
+            if self._pool is None:
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.limits['processes'],
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=exec,
+                    initargs=(_PDF_WORKER_BOOT, {}),
+                )
+            return self._pool, self._pool_generation
+
+    def _kill_pool(self, generation: int) -> None:
+        """Kills the processes of the pool (a stuck worker can not be stopped alone), the next document starts a new one"""
+        with self._pool_lock:
+            if self._pool is None or generation != self._pool_generation:
+                return
+            pool, self._pool = self._pool, None
+            self._pool_generation += 1
+        # У ProcessPoolExecutor нет отмены запущенной задачи: процессы завершаются напрямую
+        for process in list((pool._processes or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def state_root() -> Path:
+    """
+    Directory of a relative `state_dir`: the user state directory (`$XDG_STATE_HOME`, by default `~/.local/state`).
+    The temporary directory is used only when the user has no home directory
+    """
+    if root := os.environ.get('XDG_STATE_HOME'):
+        return Path(root)
+    home = Path(os.path.expanduser('~'))
+    if not home.is_absolute() or not home.is_dir():
+        return Path(tempfile.gettempdir())
+    return home / '.local' / 'state'
+
+
+def _atomic_write(path: Path, text: str) -> None:
+    """
+    Replaces the file atomically, so a concurrent reader never sees a half-written file.
+    The temporary file is unique: runs sharing `state_dir` and `probe` may save the same file at the same time
+    """
+    file = tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=path.parent, prefix=path.name + '.', suffix='.tmp', delete=False)
+    try:
+        with file:
+            file.write(text)
+        # Права как у обычного файла (NamedTemporaryFile создает файл только для владельца): метрики читает экспортер
+        os.chmod(file.name, 0o644)
+        os.replace(file.name, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(file.name)
+        raise
+
+
+@dataclasses.dataclass
+class FeedState:
+    """
+    Conditional request validators of the RSS feed and the cursor of the newest processed entry
+    """
+    etag: str | None = None
+    modified: str | None = None
+    published: datetime.datetime | None = None
+    link: str | None = None
+
+    @classmethod
+    def load(cls, path: Path) -> 'FeedState':
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return cls()
+        published = data.get('published')
+        return cls(
+            etag=data.get('etag'),
+            modified=data.get('modified'),
+            published=datetime.datetime.fromisoformat(published) if published else None,
+            link=data.get('link'),
+        )
+
+    def save(self, path: Path) -> None:
+        data = dataclasses.asdict(self)
+        data['published'] = self.published.isoformat() if self.published else None
+        _atomic_write(path, json.dumps(data))
+
+    def is_newer(self, published: datetime.datetime, link: str) -> bool:
+        """Entry was published after the cursor"""
+        if self.published is None:
+            return True
+        return published > self.published or (published == self.published and link != self.link)
+
+
+@dataclasses.dataclass
+class ScheduleAdvice:
+    """
+    Advice of `PublishingCadence`: whether a full run is due now and when to check the feed next
+    """
+    run: bool
+    reason: str
+    expected: float  # Ожидаемое число публикаций с последней проверки ленты
+    next_check: datetime.datetime
+
+
+@dataclasses.dataclass
+class PublishingCadence:
+    """
+    Publishing times of the feed items observed by the previous runs and the time of the last feed check.
+    The times stay in the time zone of the feed (see `rss_date`).
+
+    The history gives the average number of publications in every hour of the week, so the number of publications
+    expected since the last check tells whether a full run is likely to find new ones.
+    """
+    published: list[datetime.datetime] = dataclasses.field(default_factory=list)
+    checked: datetime.datetime | None = None
+
+    MAX_TIMESTAMPS = 5000
+
+    @classmethod
+    def load(cls, path: Path) -> 'PublishingCadence':
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            return cls(
+                published=[datetime.datetime.fromisoformat(value) for value in data.get('published', [])],
+                checked=datetime.datetime.fromisoformat(data['checked']) if data.get('checked') else None,
+            )
+        except (OSError, ValueError, TypeError):
+            return cls()
+
+    def save(self, path: Path) -> None:
+        data = {
+            'published': [value.isoformat() for value in self.published],
+            'checked': self.checked.isoformat() if self.checked else None,
+        }
+        _atomic_write(path, json.dumps(data))
+
+    def observe(self, published: Iterable[datetime.datetime], now: datetime.datetime, history_days: int) -> None:
+        """Adds the publishing times and forgets the ones older than `history_days`"""
+        since = now - datetime.timedelta(days=history_days)
+        self.published = sorted(value for value in {*self.published, *published} if since <= value <= now)[-self.MAX_TIMESTAMPS:]
+
+    def expected(self, start: datetime.datetime, end: datetime.datetime) -> float:
+        """Expected number of publications between `start` and `end` by the hour of the week profile"""
+        if not self.published or end <= start:
+            return 0.0
+        # Сколько недель покрывает история (неполная неделя считается целой)
+        weeks = max(1, -(-(self.published[-1] - self.published[0]).days // 7))
+        profile = collections.Counter((value.weekday(), value.hour) for value in self.published)
+        expected = 0.0
+        moment = start
+        while moment < end:
+            # Доля часа между `moment` и концом часа (или `end`)
+            hour_end = min(moment.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1), end)
+            expected += profile[moment.weekday(), moment.hour] / weeks * (hour_end - moment).total_seconds() / 3600
+            moment = hour_end
+        return expected
+
+    def advise(self, now: datetime.datetime, min_expected: float, max_interval: datetime.timedelta) -> ScheduleAdvice:
+        """
+        A full run is due when the history expects at least `min_expected` publications since the last check,
+        or when the feed was not checked for `max_interval`
+        """
+        run, reason, expected = self._due(now, min_expected, max_interval)
+        if run:
+            next_check = now + datetime.timedelta(hours=1)
+        else:
+            # Ближайший час, когда запуск станет нужен, но не позже `max_interval` после последней проверки
+            deadline = self.checked + max_interval
+            next_check = now.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1)
+            while next_check < deadline and not self._due(next_check, min_expected, max_interval)[0]:
+                next_check += datetime.timedelta(hours=1)
+            next_check = min(next_check, deadline)
+        return ScheduleAdvice(run, reason, round(expected, 3), next_check)
+
+    def _due(self, now: datetime.datetime, min_expected: float,
+             max_interval: datetime.timedelta) -> tuple[bool, str, float]:
+        if self.checked is None:
+            return True, 'the feed was never checked', 0.0
+        expected = self.expected(self.checked, now)
+        if now - self.checked >= max_interval:
+            return True, f'the feed was not checked since {self.checked}', expected
+        if expected >= min_expected:
+            return True, f'{expected:.2f} publications are expected since {self.checked}', expected
+        return False, f'{expected:.2f} publications are expected since {self.checked}', expected
+
+
+@dataclasses.dataclass
+class ProbeResult:
+    """
+    Result of `ECB.probe`
+    """
+    modified: bool  # False - лента не изменилась с прошлого запуска (HTTP 304)
+    new: bool  # Новейшая запись ленты новее курсора прошлого запуска
+    newest: datetime.datetime | None = None
+    link: str | None = None
+
+
+@dataclasses.dataclass
+class BackfillCheckpoint:
+    """
+    Progress of an interrupted crawl of the publications index: number of the processed index records,
+    a hash of their links and the last publication handed to `_find`
+    """
+    # Ограничения запуска по датам. Контрольная точка другого обхода не используется
+    scope: str
+    position: int = 0
+    links_hash: str | None = None
+    link: str | None = None
+    published: datetime.datetime | None = None
+
+    @classmethod
+    def load(cls, path: Path, scope: str) -> 'BackfillCheckpoint | None':
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if data.get('scope') != scope or not data.get('link'):
+            return None
+        published = data.get('published')
+        return cls(
+            scope=scope,
+            position=int(data.get('position') or 0),
+            links_hash=data.get('links_hash'),
+            link=data['link'],
+            published=datetime.datetime.fromisoformat(published) if published else None,
+        )
+
+    def save(self, path: Path) -> None:
+        data = dataclasses.asdict(self)
+        data['published'] = self.published.isoformat() if self.published else None
+        _atomic_write(path, json.dumps(data))
+
+    @staticmethod
+    def clear(path: Path) -> None:
+        path.unlink(missing_ok=True)
+
+
+@dataclasses.dataclass
+class BackfillShard:
+    """
+    Date range of the publications index processed by one worker of a sharded backfill
+    """
+    key: str
+    start: datetime.date
+    end: datetime.date
+    # Сколько записей индекса этого диапазона уже обработано
+    position: int = 0
+
+
+class BackfillShards:
+    """
+    Shards of a backfill and their leases in a SQLite database shared by the workers:
+    plugin instances with the same `state_dir`, in one process or in several.
+
+    A worker leases a pending shard whose lease is free or expired, renews the lease while it works
+    and saves the progress of the shard. A shard is done once all its index records are processed.
+    """
+
+    PERIODS = ('month', 'year')
+    LEASE_SECONDS = 900
+
+    def __init__(self, path: Path, lease_seconds: float = LEASE_SECONDS):
+        self.lease_seconds = float(lease_seconds)
+        # Владелец аренды уникален для запуска: аренда упавшего запуска просто истекает
+        self.owner = f'{os.uname().nodename}:{os.getpid()}:{random.getrandbits(32):08x}'
+        self._renewed = 0.0
+        self._db = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS shards (key TEXT PRIMARY KEY, start TEXT NOT NULL, end TEXT NOT NULL, '
+            'position INTEGER NOT NULL DEFAULT 0, done INTEGER NOT NULL DEFAULT 0, owner TEXT, expires REAL)'
+        )
+
+    @classmethod
+    def split(cls, ranges: Iterable[tuple[datetime.date, datetime.date]], period: str = 'month') -> list[BackfillShard]:
+        """
+        Splits the date ranges into whole months or years, the newest first. Overlapping ranges give the same shards
+        """
+        if period not in cls.PERIODS:
+            raise ValueError(f'Backfill period must be one of {cls.PERIODS}, not {period!r}')
+        shards: dict[str, BackfillShard] = {}
+        for start, end in ranges:
+            day = start.replace(day=1) if period == 'month' else start.replace(month=1, day=1)
+            while day <= end:
+                if period == 'month':
+                    following = (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+                    key = f'{day:%Y-%m}'
+                else:
+                    following = day.replace(year=day.year + 1)
+                    key = f'{day:%Y}'
+                shards[key] = BackfillShard(key, day, following - datetime.timedelta(days=1))
+                day = following
+        return sorted(shards.values(), key=lambda shard: shard.start, reverse=True)
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[None]:
+        # Блокировка на запись берется сразу, чтобы два процесса не арендовали одну часть
+        self._db.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            self._db.execute('ROLLBACK')
+            raise
+        self._db.execute('COMMIT')
+
+    def plan(self, shards: Iterable[BackfillShard]) -> None:
+        """Adds the shards that are not planned yet"""
+        with self._transaction():
+            self._db.executemany(
+                'INSERT OR IGNORE INTO shards (key, start, end) VALUES (?, ?, ?)',
+                ((shard.key, shard.start.isoformat(), shard.end.isoformat()) for shard in shards),
+            )
+
+    def acquire(self, start: datetime.date | None = None, end: datetime.date | None = None) -> BackfillShard | None:
+        """
+        Leases the newest pending shard that intersects the dates. None when no shard is left
+        """
+        now = time.time()
+        with self._transaction():
+            row = self._db.execute(
+                'SELECT key, start, end, position FROM shards WHERE done = 0 AND (owner IS NULL OR expires < ?) '
+                'AND end >= ? AND start <= ? ORDER BY start DESC LIMIT 1',
+                (now, start.isoformat() if start else '0000', end.isoformat() if end else '9999'),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE shards SET owner = ?, expires = ? WHERE key = ?', (self.owner, now + self.lease_seconds, row[0]))
+            # Аренда остальных частей этого запуска продлевается вместе с новой
+            self._db.execute('UPDATE shards SET expires = ? WHERE owner = ?', (now + self.lease_seconds, self.owner))
+        self._renewed = now
+        return BackfillShard(row[0], datetime.date.fromisoformat(row[1]), datetime.date.fromisoformat(row[2]), row[3])
+
+    def renew(self) -> None:
+        """Extends the leases of this worker. The database is updated no more often than a third of the lease"""
+        now = time.time()
+        if now - self._renewed < self.lease_seconds / 3:
+            return
+        self._db.execute('UPDATE shards SET expires = ? WHERE owner = ?', (now + self.lease_seconds, self.owner))
+        self._renewed = now
+
+    def save(self, progress: dict[str, tuple[int, bool]]) -> int:
+        """
+        Saves `(position, done)` of the leased shards.
+
+        :return: number of the shards whose lease was lost (taken by another worker after it expired)
+        """
+        lost = 0
+        with self._transaction():
+            for key, (position, done) in progress.items():
+                lost += self._db.execute(
+                    'UPDATE shards SET position = ?, done = ? WHERE key = ? AND owner = ?', (position, int(done), key, self.owner)
+                ).rowcount == 0
+        return lost
+
+    def pending(self) -> int:
+        return self._db.execute('SELECT count(*) FROM shards WHERE done = 0').fetchone()[0]
+
+    def close(self) -> None:
+        """Releases the leases of this worker"""
+        try:
+            self._db.execute('UPDATE shards SET owner = NULL, expires = NULL WHERE owner = ?', (self.owner,))
+        finally:
+            self._db.close()
+
+
+def rss_date(value: str) -> datetime.datetime | None:
+    """
+    Date of an RSS item. The RFC 822 format of the ECB feed (`Thu, 23 Jan 2025 09:00:00 +0100`) is parsed directly,
+    other formats fall back to the fuzzy parser. The time zone is dropped: the date stays in the time zone of the feed
+    """
+    try:
+        _, day, month, year, clock, _ = value.split()
+        hour, minute, second = clock.split(':')
+        return datetime.datetime(int(year), _MONTHS[month], int(day), int(hour), int(minute), int(second))
+    except (ValueError, KeyError):
+        return _fuzzy_date(value)
+
+
+@functools.lru_cache(maxsize=1024)
+def _fuzzy_date(value: str) -> datetime.datetime | None:
+    import dateutil.parser
+
+    try:
+        return dateutil.parser.parse(value).replace(tzinfo=None)
+    except (ValueError, OverflowError):
+        return None
+
+
+@dataclasses.dataclass
+class FeedItem:
+    """
+    Item of the RSS feed
+    """
+    title: str | None
+    link: str | None
+    summary: str | None
+    published: datetime.datetime | None
+
+
+class FeedReader:
+    """
+    Streaming reader of an RSS feed.
+
+    `open` makes a request with the validators of the previous run, `items` parses the response while it is downloaded
+    and yields the items one by one, so the rest of the feed is not read once the consumer stops.
+    """
+
+    def __init__(self, url: str, etag: str | None = None, modified: str | None = None, timeout: float = 30,
+                 governor: RequestGovernor | None = None, transport: HttpTransport | None = None):
+        self.url = url
+        self.timeout = timeout
+        self._governor = governor or RequestGovernor()
+        self._transport = transport or HttpTransport.shared()
+        self._validators = {'If-None-Match': etag, 'If-Modified-Since': modified}
+        self._response = None
+        self.etag: str | None = None
+        self.modified: str | None = None
+        self.size = 0  # Content-Length ответа, 0 если сервер его не указал
+
+    def open(self) -> bool:
+        """
+        :return: False when the feed is not modified since the previous run (HTTP 304)
+        """
+        import urllib.error
+
+        headers = {name: value for name, value in self._validators.items() if value}
+        try:
+            self._response = self._governor.call(self.url, self._transport.get, self.url, headers, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return False
+            raise
+        self.etag = self._response.headers.get('ETag')
+        self.modified = self._response.headers.get('Last-Modified')
+        self.size = int(self._response.headers.get('Content-Length') or 0)
+        return True
+
+    def items(self) -> Iterator[FeedItem]:
+        from xml.etree import ElementTree
+
+        with self._response:
+            for _, element in ElementTree.iterparse(self._response, events=('end',)):
+                if self._name(element) != 'item':
+                    continue
+                fields = {self._name(child): (child.text or '').strip() or None for child in element}
+                # Разобранная запись больше не нужна, в памяти держится только текущая
+                element.clear()
+                yield FeedItem(
+                    title=fields.get('title'),
+                    link=fields.get('link'),
+                    summary=fields.get('description'),
+                    published=rss_date(fields['pubDate']) if fields.get('pubDate') else None,
+                )
+
+    def close(self) -> None:
+        if self._response is not None:
+            self._response.close()
+
+    @staticmethod
+    def _name(element) -> str:
+        return element.tag.rsplit('}', 1)[-1]
+
+
+@dataclasses.dataclass
+class IndexEntry:
+    """
+    Publication record of the ECB publications index (pub-by-date)
+    """
+    link: str
+    title: str | None
+    published: datetime.datetime | None
+    type: str | None
+
+
+class IndexParser:
+    """
+    Parses the `dt`/`dd` records of the publications index chunk by chunk.
+
+    The publication date is set by a `dt` and applies to the following `dd` records,
+    so the last seen date is carried over to the next chunk.
+    Records are read in one pass by the streaming tokenizer of `html.parser`: no document tree is built,
+    only the fields of the current record are kept.
+    """
+
+    def __init__(self):
+        self.date: datetime.datetime | None = None
+        self._entries: list[IndexEntry] = []
+        self._record: str | None = None  # 'dt' или 'dd', в которой сейчас tokenizer
+        self._reset()
+
+    def _reset(self) -> None:
+        self._divs = 0  # Глубина вложенности `div` внутри записи
+        # Глубина открытого `div`: первого в записи, заголовка (`.title` внутри первого) и категории. 0 - не открыт
+        self._wrapper = self._title = self._category = 0
+        self._wrapper_seen = self._title_seen = self._category_seen = self._anchor_seen = False
+        self._link: str | None = None
+        self._isodate: str | None = None
+        self._skip = 0  # Внутри script/style текст не собирается
+        # Части текста, которые сейчас собираются: заголовок (`a`), категория, дата (`dt`)
+        self._texts: dict[str, list[str]] = {}
+        self._captured: dict[str, list[str]] = {}
+
+    def feed(self, html: str) -> list[IndexEntry]:
+        from html.parser import HTMLParser
+
+        tokenizer = HTMLParser(convert_charrefs=True)
+        tokenizer.handle_starttag = self._start
+        tokenizer.handle_endtag = self._end
+        tokenizer.handle_data = self._data
+        tokenizer.feed(html)
+        tokenizer.close()
+        # Порция индекса состоит из целых записей
+        self._close_record()
+        entries, self._entries = self._entries, []
+        return entries
+
+    def _capture(self, name: str) -> None:
+        self._texts[name] = self._captured[name] = []
+
+    def _start(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in ('dt', 'dd'):
+            self._close_record()
+            self._record = tag
+            if tag == 'dt':
+                self._isodate = dict(attrs).get('isodate')
+                self._capture('dt')
+            return
+        if self._record is None:
+            return
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        if tag in _BLOCK_TAGS:
+            for parts in self._texts.values():
+                parts.append('\0')
+        if self._record != 'dd':
+            return
+
+        if tag == 'div':
+            self._divs += 1
+            classes = (dict(attrs).get('class') or '').split()
+            if not self._category_seen and 'category' in classes:
+                self._category_seen = True
+                self._category = self._divs
+                self._capture('category')
+            if not self._wrapper_seen:
+                self._wrapper_seen = True
+                self._wrapper = self._divs
+            elif self._wrapper and not self._title_seen and 'title' in classes:
+                self._title_seen = True
+                self._title = self._divs
+        elif tag == 'a' and self._title and not self._anchor_seen:
+            self._anchor_seen = True
+            self._link = dict(attrs).get('href')
+            self._capture('title')
+
+    def _end(self, tag: str) -> None:
+        if tag == self._record:
+            self._close_record()
+            return
+        if self._record is None:
+            return
+        if tag in _SKIP_TAGS and self._skip:
+            self._skip -= 1
+        if tag == 'div' and self._record == 'dd' and self._divs:
+            if self._divs == self._category:
+                self._category = 0
+                self._texts.pop('category', None)
+            if self._divs == self._title:
+                self._title = 0
+                self._texts.pop('title', None)
+            if self._divs == self._wrapper:
+                self._wrapper = 0
+            self._divs -= 1
+        elif tag == 'a':
+            self._texts.pop('title', None)
+
+    def _data(self, data: str) -> None:
+        if self._skip:
+            return
+        for parts in self._texts.values():
+            parts.append(data)
+
+    def _close_record(self) -> None:
+        record, self._record = self._record, None
+        if record == 'dt':
+            self.date = self._date(self._isodate, self._captured.get('dt', []))
+        elif record == 'dd' and self._link is not None:
+            category = self._captured.get('category')
+            self._entries.append(IndexEntry(
+                link=self._link,
+                title=rendered_text(self._captured.get('title', [])) or None,
+                published=self.date,
+                type=rendered_text(category) if category is not None else None,
+            ))
+        self._reset()
+
+    @staticmethod
+    def _date(isodate: str | None, text: list[str]) -> datetime.datetime | None:
+        try:
+            if isodate:
+                return datetime.datetime.fromisoformat(isodate)
+            import dateutil.parser
+            return dateutil.parser.parse(rendered_text(text))
+        except (ValueError, OverflowError):
+            return None
+
+
+class SeenLinks:
+    """
+    Persistent index of the links of already ingested publications.
+
+    Links are normalised and stored as 64-bit hashes with the time they were last seen.
+    Entries not seen for `ttl_days` are evicted and the index is capped at `max_entries` (the oldest go first).
+    """
+
+    MAX_ENTRIES = 200_000
+
+    def __init__(self, path: Path, ttl_days: int, max_entries: int = MAX_ENTRIES):
+        self.ttl = datetime.timedelta(days=ttl_days)
+        self.max_entries = max_entries
+        # Асинхронный режим может работать с индексом из другого потока. Обращения к индексу последовательные
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('CREATE TABLE IF NOT EXISTS seen (key INTEGER PRIMARY KEY, seen REAL NOT NULL) WITHOUT ROWID')
+        self._db.execute('CREATE INDEX IF NOT EXISTS seen_time ON seen (seen)')
+
+    @staticmethod
+    def normalize(link: str) -> str:
+        parts = urlsplit(link.strip())
+        return urlunsplit((parts.scheme.lower() or 'https', parts.netloc.lower(), parts.path, parts.query, ''))
+
+    @classmethod
+    def key(cls, link: str) -> int:
+        digest = hashlib.blake2b(cls.normalize(link).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big', signed=True)
+
+    def __contains__(self, link: str) -> bool:
+        return self._db.execute('SELECT 1 FROM seen WHERE key = ?', (self.key(link),)).fetchone() is not None
+
+    def add(self, links: Iterable[str]) -> None:
+        now = time.time()
+        self._db.executemany('INSERT OR REPLACE INTO seen (key, seen) VALUES (?, ?)', ((self.key(link), now) for link in links))
+
+    def compact(self) -> int:
+        """
+        Evicts the expired and the excess entries.
+
+        :return: number of evicted entries
+        """
+        evicted = self._db.execute('DELETE FROM seen WHERE seen < ?', (time.time() - self.ttl.total_seconds(),)).rowcount
+        evicted += self._db.execute(
+            'DELETE FROM seen WHERE key IN (SELECT key FROM seen ORDER BY seen DESC LIMIT -1 OFFSET ?)', (self.max_entries,)
+        ).rowcount
+        return evicted
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+@dataclasses.dataclass
+class DocumentRevision:
+    """
+    Emitted publication page: fingerprint of its text and the validators of its last response
+    """
+    link: str
+    title: str | None
+    published: datetime.datetime
+    fingerprint: str
+    etag: str | None = None
+    modified: str | None = None
+    length: int | None = None
+    revision: int = 0  # 0 - первая выдача, дальше номер изменения
+
+
+class DocumentRevisions:
+    """
+    Persistent fingerprints and validators of the emitted publication pages, used to revalidate the recent ones
+    """
+
+    def __init__(self, path: Path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS revisions (link TEXT PRIMARY KEY, title TEXT, published TEXT NOT NULL, '
+            'fingerprint TEXT NOT NULL, etag TEXT, modified TEXT, length INTEGER, revision INTEGER NOT NULL, checked REAL)'
+        )
+
+    @staticmethod
+    def fingerprint(text: str | None) -> str:
+        """Hash of the text with the whitespace collapsed, so a changed markup alone is not a revision"""
+        return hashlib.blake2b(' '.join((text or '').split()).encode('utf-8'), digest_size=16).hexdigest()
+
+    def recent(self, since: datetime.datetime, limit: int) -> list[DocumentRevision]:
+        """
+        Pages published after `since`, the least recently checked first
+        """
+        rows = self._db.execute(
+            'SELECT link, title, published, fingerprint, etag, modified, length, revision FROM revisions '
+            'WHERE published >= ? ORDER BY checked IS NOT NULL, checked, published DESC LIMIT ?',
+            (since.isoformat(), limit),
+        ).fetchall()
+        return [
+            DocumentRevision(link, title, datetime.datetime.fromisoformat(published), *rest)
+            for link, title, published, *rest in rows
+        ]
+
+    def save(self, revisions: Iterable[DocumentRevision]) -> None:
+        now = time.time()
+        self._db.executemany(
+            'INSERT OR REPLACE INTO revisions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ((r.link, r.title, r.published.isoformat(), r.fingerprint, r.etag, r.modified, r.length, r.revision, now)
+             for r in revisions),
+        )
+
+    def evict(self, before: datetime.datetime) -> int:
+        """Drops the pages that left the revalidation window"""
+        return self._db.execute('DELETE FROM revisions WHERE published < ?', (before.isoformat(),)).rowcount
+
+    def commit(self) -> None:
+        self._db.commit()
+
+    def close(self) -> None:
+        self._db.close()
+
+
+class RunStats:
+    """
+    Timers and counters of one parser run.
+
+    Stages run in worker threads too, so their totals are summed over threads and may exceed the run duration.
+    Stages from `WAIT_STAGES` wait for the network or the browser, the others are the work of the parser itself.
+    """
+
+    WAIT_STAGES = frozenset(('feed', 'index', 'http', 'browser', 'document', 'throttle', 'retry'))
+    COUNTERS = ('fetched', 'skipped', 'failed', 'out_of_restriction', 'bytes')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.stages: dict[str, list[float]] = collections.defaultdict(list)
+        self.counters: collections.Counter[str] = collections.Counter({name: 0 for name in self.COUNTERS})
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add(name, time.monotonic() - started)
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage].append(seconds)
+
+    def count(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] += value
+
+    def summary(self) -> dict:
+        with self._lock:
+            stages = {name: list(values) for name, values in self.stages.items()}
+            counters = dict(self.counters)
+        totals = {name: sum(values) for name, values in stages.items()}
+        return {
+            'duration': round(time.monotonic() - self._started, 3),
+            'counters': counters,
+            'wait': round(sum(total for name, total in totals.items() if name in self.WAIT_STAGES), 3),
+            'work': round(sum(total for name, total in totals.items() if name not in self.WAIT_STAGES), 3),
+            'stages': {name: self._stage_summary(values) for name, values in stages.items()},
+        }
+
+    @staticmethod
+    def _stage_summary(values: list[float]) -> dict[str, float]:
+        cuts = statistics.quantiles(values * 2 if len(values) == 1 else values, n=100, method='inclusive')
+        return {
+            'count': len(values),
+            'total': round(sum(values), 3),
+            'p50': round(cuts[49], 6),
+            'p95': round(cuts[94], 6),
+            'p99': round(cuts[98], 6),
+            'max': round(max(values), 6),
+        }
+
+    def write(self, path: Path, summary: dict, labels: dict[str, str]) -> None:
+        """
+        Writes the summary as a Prometheus textfile (`.prom` suffix) or as JSON. The file is replaced atomically
+        """
+        if path.suffix == '.prom':
+            content = self.prometheus(summary, labels)
+        else:
+            content = json.dumps({**labels, **summary}, indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, content)
+
+    @staticmethod
+    def prometheus(summary: dict, labels: dict[str, str]) -> str:
+        def escape(value) -> str:
+            return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+        def metric(name: str, kind: str, help_: str, samples: list[tuple[dict, float]]) -> list[str]:
+            lines = [f'# HELP ecb_parser_{name} {help_}', f'# TYPE ecb_parser_{name} {kind}']
+            for extra, value in samples:
+                pairs = ','.join(f'{key}="{escape(label)}"' for key, label in {**labels, **extra}.items())
+                lines.append(f'ecb_parser_{name}{{{pairs}}} {value}')
+            return lines
+
+        stages = summary['stages']
+        lines = [
+            *metric('run_duration_seconds', 'gauge', 'Duration of the last run.', [({}, summary['duration'])]),
+            *metric('run_wait_seconds', 'gauge', 'Time spent waiting for the network and the browser.', [({}, summary['wait'])]),
+            *metric('run_work_seconds', 'gauge', 'Time spent parsing.', [({}, summary['work'])]),
+            *metric('documents', 'gauge', 'Publications of the last run by status.', [
+                ({'status': name}, value) for name, value in summary['counters'].items() if name != 'bytes'
+            ]),
+            *metric('downloaded_bytes', 'gauge', 'Bytes downloaded over HTTP.', [({}, summary['counters']['bytes'])]),
+            *metric('stage_seconds_total', 'gauge', 'Total time of the stage.', [
+                ({'stage': name}, stage['total']) for name, stage in stages.items()
+            ]),
+            *metric('stage_calls', 'gauge', 'Number of the stage calls.', [
+                ({'stage': name}, stage['count']) for name, stage in stages.items()
+            ]),
+            *metric('stage_seconds', 'gauge', 'Percentiles of the stage duration.', [
+                ({'stage': name, 'quantile': q}, stage[key])
+                for name, stage in stages.items() for q, key in (('0.5', 'p50'), ('0.95', 'p95'), ('0.99', 'p99'))
+            ]),
+        ]
+        if 'http' in summary:
+            lines += metric('http_requests', 'gauge', 'HTTP requests by connection: new or reused keep-alive.', [
+                ({'connection': 'new'}, summary['http']['connections']), ({'connection': 'reused'}, summary['http']['reused']),
+            ])
+        return '\n'.join(lines) + '\n'
+
+
+class ECBWaits:
+    """
+    Condition-driven waits of the web driver.
+
+    Every step has its own timeout (seconds) and the duration of every wait is kept in `timings`.
+    A step that timed out returns None instead of raising.
+    """
+
+    TIMEOUTS = {
+        'main': 15,         # элемент `main` на странице публикации
+        'section': 15,      # блок `.section` с текстом публикации
+        'index': 20,        # индекс публикаций (`dl-wrapper` и `lazy-load-hit`)
+        'consent': 2,       # кнопка согласия с cookies
+        'lazy_load': 3,     # появление новых записей в индексе после прокрутки
+        'dom': 15,          # разбор HTML документа (DOMContentLoaded) при облегченной загрузке страниц
+    }
+    POLL = 0.1
+
+    CONSENT = ('xpath', "//a[contains(text(),'I understand and I accept')]")  # By.XPATH
+    # Помечает текущий документ, чтобы после перехода без ожидания дождаться именно нового документа
+    MARK_STALE = 'window.__ecbStale = true;'
+
+    def __init__(self, driver: 'WebDriver', timeouts: dict | None = None):
+        self._driver = driver
+        self.timeouts = {**self.TIMEOUTS, **(timeouts or {})}
+        self.timings: dict[str, list[float]] = collections.defaultdict(list)
+
+    def until(self, step: str, condition: Callable):
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        started = time.monotonic()
+        try:
+            return WebDriverWait(self._driver, self.timeouts[step], poll_frequency=self.POLL).until(condition)
+        except TimeoutException:
+            return None
+        finally:
+            self.timings[step].append(time.monotonic() - started)
+
+    def document(self):
+        """Waits until the document that replaced the marked one is parsed (DOMContentLoaded)"""
+        return self.until('dom', lambda driver: driver.execute_script(
+            'return !window.__ecbStale && document.readyState !== "loading";'
+        ))
+
+    def main(self):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
+
+        return self.until('main', ec.presence_of_element_located((By.TAG_NAME, 'main')))
+
+    def section(self):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
+
+        return self.until('section', ec.presence_of_element_located((By.CSS_SELECTOR, 'main .section')))
+
+    def index(self):
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
+
+        return self.until('index', ec.presence_of_element_located((By.CSS_SELECTOR, '.dl-wrapper, .lazy-load-hit')))
+
+    def consent(self) -> bool:
+        """Accepts cookies if the consent button appears"""
+        from selenium.webdriver.support import expected_conditions as ec
+
+        button = self.until('consent', ec.element_to_be_clickable(self.CONSENT))
+        if button is None:
+            return False
+        button.click()
+        self.until('consent', ec.invisibility_of_element_located(self.CONSENT))
+        return True
+
+    def index_size(self, dl_wrapper) -> int:
+        return self._driver.execute_script("return arguments[0].getElementsByTagName('dd').length;", dl_wrapper)
+
+    def growth(self, dl_wrapper, size: int) -> int | None:
+        """
+        Waits until the index has more than `size` entries.
+
+        :return: new number of entries or None when the index stopped growing
+        """
+        def grown(driver):
+            current = self.index_size(dl_wrapper)
+            return current if current > size else False
+
+        return self.until('lazy_load', grown)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {
+            step: {'count': len(values), 'total': round(sum(values), 3), 'max': round(max(values), 3)}
+            for step, values in self.timings.items()
+        }
+
+
+class LeanPageLoad:
+    """
+    Lightweight page loading for Chromium web drivers through the DevTools protocol.
+
+    Requests of images, media, fonts, stylesheets and analytics are blocked, and the navigation does not wait
+    for the `load` event: the page is ready as soon as its HTML is parsed (the `eager` page load strategy).
+    The page load strategy of an existing session cannot be changed, so the navigation is made with `Page.navigate`.
+    """
+
+    BLOCKED_URLS = [
+        # images and media
+        '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico', '*.bmp', '*.avif',
+        '*.mp4', '*.webm', '*.mp3', '*.ogg', '*.wav',
+        # fonts and stylesheets
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot', '*.css',
+        # analytics
+        '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*webanalytics*', '*matomo*', '*piwik*',
+        '*hotjar*', '*facebook.net*', '*twitter.com/i/*', '*linkedin.com/px*',
+    ]
+
+    def __init__(self, driver: 'WebDriver', waits: 'ECBWaits'):
+        self._driver = driver
+        self._waits = waits
+        # Блокировка запросов действует на вкладку, поэтому включается в каждой вкладке отдельно
+        self._windows: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._windows)
+
+    @property
+    def supported(self) -> bool:
+        return hasattr(self._driver, 'execute_cdp_cmd')
+
+    def enable(self) -> None:
+        self._driver.execute_cdp_cmd('Network.enable', {})
+        self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.BLOCKED_URLS})
+        self._windows.add(self._driver.current_window_handle)
+
+    def disable(self) -> None:
+        """Restores the default page loading in the tabs that are still open, the web driver is shared with other plugins"""
+        if not self._windows:
+            return
+        current = self._driver.current_window_handle
+        for window in self._windows.intersection(self._driver.window_handles):
+            if window != current:
+                self._driver.switch_to.window(window)
+            self._driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+            self._driver.execute_cdp_cmd('Network.disable', {})
+        if self._driver.current_window_handle != current:
+            self._driver.switch_to.window(current)
+        self._windows.clear()
+
+    def start(self, url: str) -> None:
+        """Starts the navigation of the current tab without waiting for the page"""
+        if self._driver.current_window_handle not in self._windows:
+            self.enable()
+        # `Page.navigate` не ждет загрузки документа. Текущий документ помечается, чтобы дождаться именно нового
+        self._driver.execute_script(ECBWaits.MARK_STALE)
+        self._driver.execute_cdp_cmd('Page.navigate', {'url': url})
+
+    def get(self, url: str) -> None:
+        self.start(url)
+        self._waits.document()
+
+
+class TabPool:
+    """
+    Pool of browser tabs of the web driver session used to load publication pages in parallel.
+
+    A WebDriver session runs one command at a time, so the pages are started in all tabs without waiting
+    and are read tab by tab in the order of the items, while the other tabs keep loading.
+    A tab that failed or timed out is closed and replaced with a new one.
+    Every page load takes a token of the host from `governor`, and its outcome is reported to the circuit breaker.
+    """
+
+    def __init__(self, driver: 'WebDriver', waits: ECBWaits, size: int, lean: LeanPageLoad | None = None,
+                 governor: RequestGovernor | None = None):
+        self._driver = driver
+        self._governor = governor or RequestGovernor()
+        self._waits = waits
+        self._size = size
+        self._lean = lean if lean is not None and lean.supported else None
+        self._tabs: list[str] = []
+        self.recycled = 0
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def map(self, items: Iterable[T], url_of: Callable[[T], str], read: Callable[[str], ECBArticle]) -> Iterator[tuple[T, ECBArticle | None]]:
+        """
+        Loads the web pages of `items` in the tabs and reads them with `read` (called in the tab of the page).
+        Yields `(item, article)` in the order of `items`. `article` is None for documents and failed pages.
+        A failed page is yielded with the window that was current before the pool was active, so the caller
+        may load the page again with the web driver without disturbing the tabs of the pool.
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        origin = self._driver.current_window_handle
+        queue: collections.deque[tuple[T, str | None, str]] = collections.deque()
+        iterator = iter(items)
+
+        def start_next(tab: str | None) -> None:
+            # Следующая web-страница загружается в освободившейся вкладке. Документы в браузере не открываются
+            # Вкладка открывается после чтения очередного элемента: источник элементов может сам переключать вкладки
+            for item in iterator:
+                url = url_of(item)
+                if not url.endswith('html'):
+                    queue.append((item, None, url))
+                    continue
+                self._start(tab or self._open(), url)
+                queue.append((item, self._driver.current_window_handle, url))
+                return
+
+        try:
+            for _ in range(self._size):
+                start_next(None)
+            while queue:
+                item, tab, url = queue.popleft()
+                if tab is None:
+                    yield item, None
+                    continue
+                try:
+                    self._driver.switch_to.window(tab)
+                    if self._waits.document() is None or self._waits.section() is None:
+                        raise TimeoutException(f'Web page {url} is not loaded')
+                    article = read(url)
+                    self.logger.debug('Entered on web page ' + url)
+                    self._governor.report(url)
+                except Exception as e:
+                    self.logger.error(f'Tab with {url} is recycled: {e}')
+                    self._governor.report(url, e)
+                    article = None
+                    tab = self._recycle(tab)
+                start_next(tab)
+                if article is None:
+                    # В активной вкладке пула уже загружается следующая страница, повторная загрузка идет в исходной
+                    self._driver.switch_to.window(origin)
+                yield item, article
+        finally:
+            self._close(origin)
+
+    def _open(self) -> str:
+        self._driver.switch_to.new_window('tab')
+        tab = self._driver.current_window_handle
+        self._tabs.append(tab)
+        return tab
+
+    def _start(self, tab: str, url: str) -> None:
+        self._governor.wait(url)
+        self._driver.switch_to.window(tab)
+        if self._lean is not None:
+            self._lean.start(url)
+        else:
+            self._driver.execute_script(ECBWaits.MARK_STALE + ' window.location.href = arguments[0];', url)
+
+    def _recycle(self, tab: str) -> str:
+        from selenium.common.exceptions import WebDriverException
+
+        self.recycled += 1
+        self._tabs.remove(tab)
+        try:
+            self._driver.switch_to.window(tab)
+            self._driver.close()
+        except WebDriverException as e:
+            self.logger.debug(f'Tab is not closed: {e}')
+        return self._open()
+
+    def _close(self, origin: str) -> None:
+        from selenium.common.exceptions import WebDriverException
+
+        for tab in self._tabs:
+            try:
+                self._driver.switch_to.window(tab)
+                self._driver.close()
+            except WebDriverException as e:
+                self.logger.debug(f'Tab is not closed: {e}')
+        self._tabs.clear()
+        self._driver.switch_to.window(origin)
+
+
+def ordered_map(func: Callable[[T], R], items: Iterable[T], limit: int) -> Iterator[tuple[T, Future]]:
+    """
+    Runs `func` over `items` in a bounded thread pool and yields `(item, future)` pairs in the order of `items`.
+
+    No more than `limit` items are in flight, and `items` is consumed lazily.
+    Closing the generator cancels the work that has not been started yet.
+    """
+    limit = max(1, int(limit))
+    executor = ThreadPoolExecutor(max_workers=limit, thread_name_prefix='ecb-fetch')
+    window: collections.deque[tuple[T, Future]] = collections.deque()
+    try:
+        for item in items:
+            window.append((item, executor.submit(func, item)))
+            if len(window) >= limit:
+                yield window.popleft()
+        while window:
+            yield window.popleft()
+    finally:
+        for _, future in window:
+            future.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def async_ordered_map(func: Callable[[T], Awaitable[R]], items: Iterable[T], limit: int) -> AsyncIterator[tuple[T, R]]:
+    """
+    Asynchronous counterpart of `ordered_map`: runs `func` over `items` as tasks and yields `(item, result)`
+    in the order of `items`. No more than `limit` tasks are scheduled ahead.
+    Closing the generator cancels the scheduled tasks.
+    """
+    import asyncio
+
+    limit = max(1, int(limit))
+    window: collections.deque[tuple[T, asyncio.Future]] = collections.deque()
+    try:
+        for item in items:
+            window.append((item, asyncio.ensure_future(func(item))))
+            if len(window) >= limit:
+                item, task = window.popleft()
+                yield item, await task
+        while window:
+            item, task = window.popleft()
+            yield item, await task
+    finally:
+        for _, task in window:
+            task.cancel()
+        await asyncio.gather(*(task for _, task in window), return_exceptions=True)
+
+
+def run_coroutine(coroutine: Awaitable[R]) -> R:
+    """
+    Runs the coroutine from synchronous code. When the calling thread already runs an event loop,
+    the coroutine gets its own loop in a separate thread
+    """
+    import asyncio
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='ecb-async') as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+class AsyncFetcher:
+    """
+    Shared asynchronous HTTP client.
+
+    Uses `aiohttp` when it is installed, otherwise every request runs over `transport` in the default thread pool
+    of the loop. Both honour the proxy environment variables.
+    No more than `concurrency` requests run at once, every request is limited by `timeout` (seconds).
+    """
+
+    TIMEOUT = 30
+
+    def __init__(self, concurrency: int, timeout: float = TIMEOUT, stats: 'RunStats | None' = None,
+                 governor: RequestGovernor | None = None, transport: HttpTransport | None = None):
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+        self._stats = stats or RunStats()
+        self._governor = governor or RequestGovernor(stats=self._stats)
+        self._transport = transport or HttpTransport.shared()
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncFetcher':
+        import asyncio
+
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            import aiohttp
+        except ImportError:
+            return self
+        self._session = aiohttp.ClientSession(
+            headers={'User-Agent': USER_AGENT, 'Accept-Language': 'en'},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            raise_for_status=True,
+            trust_env=True,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get(self, url: str) -> tuple[bytes, Mapping[str, str]]:
+        """
+        :return: body and headers of the response
+        """
+        body, headers = await self._governor.acall(url, lambda: self._get(url))
+        self._stats.count('bytes', len(body))
+        return body, headers
+
+    async def _get(self, url: str) -> tuple[bytes, Mapping[str, str]]:
+        import asyncio
+
+        # Семафор занимает только сам запрос, паузы перед повтором его не держат
+        async with self._semaphore:
+            with self._stats.stage('http'):
+                if self._session is None:
+                    return await asyncio.to_thread(self._transport_get, url)
+                async with self._session.get(url) as response:
+                    return await response.read(), response.headers
+
+    def _transport_get(self, url: str) -> tuple[bytes, Mapping[str, str]]:
+        with self._transport.get(url, timeout=self.timeout) as response:
+            return response.read(), response.headers
+
+
+class DocumentStream:
+    """
+    Target of `S3PParserBase._find` in the streaming mode, used in place of the list of the parsed documents.
+
+    A found document is passed to `emit` as soon as it is complete. Documents that wait for the text extraction
+    are held back to keep the order of `_find`, no more than `buffer` of them.
+    Only the links of the emitted documents are kept.
+    """
+
+    def __init__(self, emit: Callable[[S3PDocument], None], pending: Callable[[S3PDocument], Future | None],
+                 complete: Callable[[S3PDocument], None], buffer: int):
+        self._emit = emit
+        self._pending = pending
+        self._complete = complete
+        self._buffer = max(1, int(buffer))
+        self._held: collections.deque[S3PDocument] = collections.deque()
+        self._count = 0
+        self.links: list[str] = []
+
+    def append(self, document: S3PDocument) -> None:
+        self._count += 1
+        self._held.append(document)
+        self.flush(wait=False)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def flush(self, wait: bool = True) -> None:
+        """
+        Emits the complete documents. With `wait` waits for all held documents, otherwise only while the buffer is full
+        """
+        while self._held:
+            document = self._held[0]
+            text = self._pending(document)
+            if text is not None and not text.done() and not wait and len(self._held) <= self._buffer:
+                break
+            self._complete(document)
+            self._held.popleft()
+            self.links.append(document.link)
+            self._emit(document)
 
 
 class ECB(S3PParserBase):
@@ -21,204 +2008,1144 @@ class ECB(S3PParserBase):
     """
 
     HOST = 'https://www.ecb.europa.eu/pub/pubbydate/html/index.en.html'
+    # Возвращает HTML элемента `main` и блока `.footnotes` (если он вне `main`) страницы публикации
+    ARTICLE_SCRIPT = """
+        var main = document.querySelector('main');
+        var footnotes = document.querySelector('.footnotes');
+        if (footnotes && main && main.contains(footnotes)) { footnotes = null; }
+        return [main ? main.outerHTML : null, footnotes ? footnotes.outerHTML : null];
+    """
+    # Возвращает число записей (`dt` и `dd`) в индексе и HTML записей, начиная с позиции arguments[1]
+    INDEX_CHUNK_SCRIPT = """
+        var dl = arguments[0].querySelector('dl') || arguments[0];
+        var html = [];
+        for (var i = arguments[1]; i < dl.children.length; i++) { html.push(dl.children[i].outerHTML); }
+        return [dl.children.length, html.join('')];
+    """
     RSS = "https://www.ecb.europa.eu/rss/pub.html"
     YEARS = [2025, 2024]
     DOMAIN = 'https://www.ecb.europa.eu'
+    # Фрагмент индекса публикаций за год, который подгружается на странице HOST при прокрутке
+    INDEX_FRAGMENT = '/pub/pubbydate/{year}/html/index_include.en.html'
+    REVALIDATION = {
+        'window_days': 14,  # страницы, опубликованные за столько дней, проверяются повторно
+        'max_links': 50,    # сколько страниц проверяется за один запуск (сначала те, что дольше не проверялись)
+    }
+    SCHEDULE = {
+        'min_expected': 0.5,        # запуск нужен, если с прошлой проверки ожидается столько публикаций
+        'max_interval_hours': 24,   # лента проверяется не реже, даже если публикаций не ожидается
+        'history_days': 120,        # сколько дней истории публикаций учитывается
+        'timezone': 'Europe/Berlin',  # часовой пояс дат ленты ECB
+    }
 
-    def __init__(self, refer: S3PRefer, plugin: S3PPlugin, restrictions: S3PPluginRestrictions, web_driver: WebDriver, use_rss: bool = 0):
+    def __init__(self, refer: S3PRefer, plugin: S3PPlugin, restrictions: S3PPluginRestrictions, web_driver: 'WebDriver', use_rss: bool = 0, use_http: bool = 0, concurrency: int = 1, state_dir: str = None, wait_timeouts: dict = None, use_fragments: bool = 0, years: list = None, extract_documents: bool = 0, document_limits: dict = None, seen_ttl_days: int = 0, lean_page_load: bool = 0, browser_tabs: int = 1, metrics_path: str = None, use_async: bool = 0, stream_buffer: int = 16, request_policy: dict = None, http_pool: dict = None, revalidate: dict = None, adaptive_schedule: dict = None, resume_backfill: bool = 0, backfill: dict = None):
         super().__init__(refer, plugin, restrictions)
 
         # Тут должны быть инициализированы свойства, характерные для этого парсера. Например: WebDriver
         self._use_rss = bool(use_rss)  # Этот флаг будет сигнализировать о способе получения ссылок на публикации
+        self._use_http = bool(use_http)  # Страницы публикаций загружаются без браузера (WebDriver остается запасным вариантом)
+        self._concurrency = max(1, int(concurrency))  # Сколько страниц загружается по HTTP одновременно
+        # Режим RSS загружает страницы асинхронно в одном потоке (нужен `use_http`)
+        self._use_async = bool(use_async)
+
+        # Каталог для состояния между запусками. None - состояние не сохраняется
+        # Относительный путь отсчитывается от каталога состояния пользователя: временный каталог очищается при перезагрузке
+        self._state_dir = state_root() / state_dir if state_dir else None
+        if self._state_dir is not None and self._state_dir.is_relative_to(tempfile.gettempdir()):
+            self.logger.warning(f'State of the runs is kept in the temporary directory {self._state_dir} and may be lost')
+        self._feed_state: FeedState | None = None
+        # Курсор ленты сохраняется, только если обработаны все новые записи: лента прочитана до курсора прошлого
+        # запуска и ни одна запись не пропущена из-за ошибки или ограничений. Иначе следующий запуск читает их снова
+        self._feed_complete = False
+        self._feed_gaps = 0
+        # Таймеры этапов и счетчики запуска. Итог пишется в лог и, если задан `metrics_path`, в файл (.prom или JSON)
+        self._stats = RunStats()
+        self._metrics_path = Path(tempfile.gettempdir()) / metrics_path if metrics_path else None
+        # Ограничение частоты, повторы и остановка запуска, если сайт деградировал. Общие для всех HTTP запросов
+        self._governor = RequestGovernor(request_policy, self._stats)
+        # Общие keep-alive соединения со сжатием для ленты, страниц, фрагментов индекса и документов
+        self._transport = HttpTransport(http_pool)
+        # Ссылки уже сохраненных публикаций. Такие публикации не загружаются повторно
+        self._seen_ttl_days = int(seen_ttl_days)
+        self._seen: SeenLinks | None = None
 
         self._driver = web_driver
-        self._wait = WebDriverWait(self._driver, timeout=20)
+        # Индекс публикаций загружается по HTTP фрагментами за каждый год, без прокрутки страницы в браузере
+        self._use_fragments = bool(use_fragments)
+        self._years = sorted(years or self.YEARS, reverse=True)
+        # Обход индекса сохраняет контрольную точку (нужен `state_dir`), прерванный обход продолжается с нее
+        self._resume_backfill = bool(resume_backfill)
+        self._checkpoint_path: Path | None = None
+        self._checkpoint: BackfillCheckpoint | None = None  # Точка, с которой продолжается этот запуск
+        self._progress: BackfillCheckpoint | None = None  # Последняя обработанная публикация этого запуска
+        # Исторический обход архива, разделенный на части по месяцам или годам. Части распределяются между
+        # экземплярами плагина с общим `state_dir`, каждая часть хранит свой прогресс
+        self._backfill = dict(backfill) if backfill else None
+        if self._backfill is not None and self._state_dir is None:
+            raise ValueError('Sharded backfill needs `state_dir` shared by the workers')
+        self._shards: BackfillShards | None = None
+        self._shard_progress: dict[str, tuple[int, bool]] = {}
+        self._shard_started: dict[str, int] = {}  # Прогресс частей на момент аренды
+        self._shard_index: tuple[int, list[IndexEntry]] | None = None  # Фрагмент индекса за год текущей части
+
+        # Повторная проверка недавно выданных страниц условными запросами. Пустой словарь - выключена
+        self._revalidation = {**self.REVALIDATION, **revalidate} if revalidate else None
+        if self._revalidation is not None and self._state_dir is None:
+            raise ValueError('Revalidation needs `state_dir` to keep the fingerprints of the emitted pages')
+        self._revisions: DocumentRevisions | None = None
+        self._validators: dict[str, tuple[str | None, str | None, int]] = {}  # URL -> ETag, Last-Modified, длина
+        self._emitted: dict[str, DocumentRevision] = {}  # Выданные в этом запуске страницы
+        self._checked: dict[str, DocumentRevision] = {}  # Проверенные страницы без изменений
+
+        # Режим RSS: запуск по расписанию пропускается, если по истории публикаций новых не ожидается.
+        # Пустой словарь - запуск выполняется всегда
+        self._schedule = {**self.SCHEDULE, **adaptive_schedule} if adaptive_schedule else None
+        if self._schedule is not None and self._state_dir is None:
+            raise ValueError('Adaptive schedule needs `state_dir` to keep the publishing history')
+        self._observed: list[datetime.datetime] = []  # Даты записей ленты, прочитанных в этом запуске
+
+        # Текст документов (PDF) извлекается в отдельных процессах параллельно с загрузкой web-страниц
+        self._documents = DocumentExtractor(document_limits, self._stats, self._governor, self._transport) if extract_documents else None
+        self._document_texts: dict[int, tuple[S3PDocument, Future]] = {}
+
+        # Потоковая выдача (`stream`, `stream_to`): сколько найденных документов может ждать потребителя
+        self._stream_buffer = max(1, int(stream_buffer))
+        self._stopped = threading.Event()
+
+        self._waits = ECBWaits(self._driver, wait_timeouts)  # Ожидания по условиям вместо фиксированных пауз
+        # Облегченная загрузка страниц в браузере: без картинок, шрифтов, стилей и аналитики
+        self._lean = LeanPageLoad(self._driver, self._waits) if lean_page_load else None
+        self._browser_tabs = max(1, int(browser_tabs))  # Сколько страниц одновременно загружается во вкладках браузера
+        self._index_window: str | None = None
+        self._rejected = 0  # Публикации, которые не удалось загрузить
+        self._article_window: str | None = None
+
+    def stream_to(self, callback: Callable[[S3PDocument], None]) -> int:
+        """
+        Streaming counterpart of `content`: every found document is passed to `callback` as soon as it is complete,
+        the parser does not keep the documents.
+
+        :return: number of the found documents
+        """
+        def emit(document: S3PDocument) -> None:
+            self._remember(document)
+            callback(document)
+
+        self._parsed_document = DocumentStream(emit, self._pending_text, self._document_text, self._stream_buffer)
+        self.logger.debug("Parse process start")
+        try:
+            self._parse()
+        except S3PPluginParserFinish as e:
+            self.logger.debug(str(e))
+        except Exception as e:
+            er = S3PPluginPayloadError(self._plugin, "Parsing stopped with error", e)
+            self.logger.error(str(er))
+            raise er from e
+        else:
+            self.logger.debug("Parse process finished")
+        return len(self._parsed_document)
+
+    def stream(self) -> Iterator[S3PDocument]:
+        """
+        Runs the parser in a background thread and yields the documents as soon as they are found.
+        The parser waits while `stream_buffer` documents are not taken.
+
+        Closing the generator stops the parser without saving the state of the run (feed cursor, seen links),
+        so the next run yields the documents that may have been lost again.
+        """
+        documents: queue.Queue = queue.Queue(maxsize=self._stream_buffer)
+        end = object()
+        errors: list[Exception] = []
+
+        def put(item) -> None:
+            while not self._stopped.is_set():
+                try:
+                    documents.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def run() -> None:
+            try:
+                self.stream_to(put)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(end)
+
+        self._stopped.clear()
+        worker = threading.Thread(target=run, name='ecb-stream', daemon=True)
+        worker.start()
+        try:
+            while (document := documents.get()) is not end:
+                yield document
+            if errors:
+                raise errors[0]
+        finally:
+            # Парсер останавливается на следующем найденном документе
+            self._stopped.set()
+            worker.join()
+
+    def advise(self, now: datetime.datetime | None = None) -> ScheduleAdvice:
+        """
+        Tells whether a full run is due now by the publishing history of the feed (`adaptive_schedule`)
+        """
+        options = self._schedule or self.SCHEDULE
+        cadence = PublishingCadence.load(self._state_file('cadence.json')) if self._state_dir else PublishingCadence()
+        return cadence.advise(now or self._feed_now(), options['min_expected'],
+                              datetime.timedelta(hours=options['max_interval_hours']))
+
+    def probe(self) -> ProbeResult:
+        """
+        One conditional request of the RSS feed that reads only the newest item: tells whether a full run would find
+        new publications. The state of the feed is not changed, the publishing time of the item is kept
+        for `adaptive_schedule`
+        """
+        state_path = self._state_file('feed.json')
+        state = FeedState.load(state_path) if state_path else FeedState()
+        feed = FeedReader(self.RSS, etag=state.etag, modified=state.modified, governor=self._governor, transport=self._transport)
+        try:
+            if not feed.open():
+                return ProbeResult(modified=False, new=False)
+            with contextlib.closing(feed.items()) as items:
+                head = next((item for item in items if item.link is not None and item.published is not None), None)
+        finally:
+            feed.close()
+            self._transport.close()
+        if head is None:
+            return ProbeResult(modified=True, new=False)
+        if self._schedule is not None:
+            path = self._state_file('cadence.json')
+            cadence = PublishingCadence.load(path)
+            cadence.observe([head.published], self._feed_now(), self._schedule['history_days'])
+            cadence.save(path)
+        return ProbeResult(modified=True, new=state.is_newer(head.published, head.link), newest=head.published, link=head.link)
+
+    def _feed_now(self) -> datetime.datetime:
+        """Current time in the time zone of the feed dates"""
+        from zoneinfo import ZoneInfo
+
+        return datetime.datetime.now(ZoneInfo((self._schedule or self.SCHEDULE)['timezone'])).replace(tzinfo=None)
+
+    def _due(self) -> bool:
+        advice = self.advise()
+        if advice.run:
+            self.logger.info(f'Run is due: {advice.reason}')
+        else:
+            self.logger.info(f'Run is skipped: {advice.reason}, next check at {advice.next_check:%Y-%m-%d %H:%M}')
+        return advice.run
+
+    def _find(self, document: S3PDocument):
+        if self._stopped.is_set():
+            raise S3PPluginParserFinish(self._plugin, 'Consumer of the document stream is closed')
+        super()._find(document)
 
     def _parse(self) -> None:
+        if self._seen_ttl_days > 0 and self._state_dir is not None:
+            self._seen = SeenLinks(self._state_file('seen.sqlite'), self._seen_ttl_days)
+        if self._resume_backfill and not self._use_rss and self._state_dir is not None:
+            self._checkpoint_path = self._state_file('checkpoint.json')
+            self._checkpoint = BackfillCheckpoint.load(self._checkpoint_path, self._backfill_scope())
+        if self._backfill is not None and not self._use_rss:
+            self._shards = BackfillShards(self._state_file('shards.sqlite'),
+                                          self._backfill.get('lease_seconds', BackfillShards.LEASE_SECONDS))
+        if self._revalidation is not None:
+            self._revisions = DocumentRevisions(self._state_file('revisions.sqlite'))
+
         # Добавил новую реализацию через RSS
-        if self._use_rss:
-            self._new_parse()
+        outcome = 'failed'
+        try:
+            if self._use_rss and self._schedule is not None and not self._due():
+                # Публикаций не ожидается: запуск не делает запросов и не меняет состояние
+                outcome = 'skipped'
+                return
+            if self._use_rss:
+                self._new_parse()
+            elif self._shards is not None:
+                self._sharded_backfill()
+            else:
+                self._old_parser()
+        except CircuitOpen as e:
+            # Сайт деградировал: найденные документы отдаются, но состояние не сохраняется, и следующий запуск повторит работу
+            self._fill_document_texts()
+            self._save_progress()
+            outcome = 'degraded'
+            raise S3PPluginParserFinish(self._plugin, f'Run is stopped early: {e}', e) from e
+        except S3PPluginParserFinish:
+            self._finish_run()
+            outcome = 'finished'
+            raise
+        except Exception as e:
+            if self._checkpoint_path is None and self._shards is None:
+                raise
+            if not isinstance(e, interruption_errors()):
+                # Ошибка парсера, а не сайта: прогресс сохраняется, но запуск падает, чтобы ошибку было видно
+                self._save_progress()
+                raise
+            # Прерванный обход архива: найденные документы отдаются, следующий запуск продолжит с контрольной точки
+            self.logger.error(f'Backfill is interrupted: {e}')
+            self._fill_document_texts()
+            self._save_progress()
+            outcome = 'interrupted'
+            raise S3PPluginParserFinish(self._plugin, f'Backfill is interrupted: {e}', e) from e
         else:
-            self._old_parser()
+            self._finish_run()
+            outcome = 'finished'
+        finally:
+            if self._lean is not None:
+                try:
+                    self._lean.disable()
+                except Exception as e:
+                    self.logger.error(f'Default page loading is not restored: {e}')
+            if self._documents is not None:
+                self._documents.shutdown()
+            if self._seen is not None:
+                self._seen.close()
+            if self._shards is not None:
+                self._shards.close()
+            if self._revisions is not None:
+                self._revisions.close()
+            self._transport.close()
+            self._release_windows()
+            self._report(outcome)
 
-    def _new_parse(self) -> None:
+    def _report(self, outcome: str) -> None:
+        """
+        Logs the summary of the run (stage timings, counters, web driver waits) and writes it to `metrics_path`
+        """
+        summary = self._stats.summary()
+        summary['found'] = len(self._parsed_document)
+        if self._waits.timings:
+            summary['waits'] = self._waits.summary()
+        if (transport := self._transport.stats())['requests']:
+            summary['http'] = transport
+        self.logger.info(f'Run summary ({outcome}): {json.dumps(summary)}')
+        if self._metrics_path is not None:
+            try:
+                self._stats.write(self._metrics_path, summary, {'refer': self._refer.name, 'outcome': outcome})
+            except OSError as e:
+                self.logger.error(f'Run metrics are not written to {self._metrics_path}: {e}')
 
-        for unfilled_doc in self._latest_pubs():
-            if unfilled_doc.link.endswith('html'):
-                # Если публикация - это web-страница, то мы заходим на нее и собираем все данные
-                try:
-                    self._driver.get(unfilled_doc.link)
-                    self.logger.debug('Entered on web page ' + unfilled_doc.link)
-                    time.sleep(2)
+    def _state_file(self, suffix: str) -> Path | None:
+        """
+        Path of the persisted state file of this source. None when `state_dir` is not configured
+        """
+        if self._state_dir is None:
+            return None
+        self._state_dir.mkdir(parents=True, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '_', self._refer.name or 'ecb')
+        return self._state_dir / f'{name}.{suffix}'
 
-                    article = self._driver.find_element(By.TAG_NAME, 'main')
+    def _finish_run(self) -> None:
+        if not self._stopped.is_set():
+            self._revalidate()
+        if self._stopped.is_set():
+            # Потребитель закрыл поток: неизвестно, какие документы он успел взять, поэтому состояние не сохраняется
+            # и следующий запуск выдаст их повторно
+            for doc, text in self._document_texts.values():
+                text.cancel()
+            self._document_texts.clear()
+            # Контрольная точка и части обхода возвращаются к прогрессу на начало запуска
+            self._progress = self._checkpoint
+            if self._checkpoint_path is not None and self._progress is None:
+                BackfillCheckpoint.clear(self._checkpoint_path)
+            self._shard_progress = {key: (position, False) for key, position in self._shard_started.items()}
+            self._save_progress()
+            self.logger.info('Document stream is closed by the consumer, the state of the run is not saved')
+            return
+        self._fill_document_texts()
+        self._commit_state()
+        if self._checkpoint_path is not None and self._rejected:
+            self.logger.warning(f'Backfill checkpoint is kept: {self._rejected} publications failed and are retried by the next run')
+        elif self._checkpoint_path is not None:
+            # Обход завершен: контрольная точка больше не нужна
+            BackfillCheckpoint.clear(self._checkpoint_path)
+            self._progress = None
+        self._save_progress()
 
-                    try:
-                        category = article.find_element(By.XPATH, ".//div[@class='title']//ul/li").text
+    def _backfill_scope(self) -> str:
+        return f'{self._restriction.from_date}..{self._restriction.to_date}'
+
+    def _save_progress(self) -> None:
+        """
+        Persists the progress of the index crawl (checkpoint, backfill shards). The documents up to it must be delivered by then
+        """
+        if self._checkpoint_path is not None and self._progress is not None:
+            try:
+                self._progress.save(self._checkpoint_path)
+            except OSError as e:
+                self.logger.error(f'Backfill checkpoint is not saved to {self._checkpoint_path}: {e}')
+        if self._shards is not None and self._shard_progress:
+            try:
+                lost = self._shards.save(self._shard_progress)
+            except sqlite3.Error as e:
+                self.logger.error(f'Progress of the backfill shards is not saved: {e}')
+            else:
+                if lost:
+                    self.logger.warning(f'{lost} backfill shards are leased by another worker, their progress is not saved')
 
-                        # Тут мы создаем словарь потому что до этого его не создавали
-                        unfilled_doc.other = {
-                            'category': category,
-                        }
-                    except:
-                        category = None
+    def _progressed(self) -> None:
+        """
+        Called when the progress of the index crawl moved to the next publication handed to `_find`
+        """
+        # В потоковом режиме документ уже передан потребителю, и контрольная точка сохраняется сразу.
+        # Список документов отдается только в конце запуска, поэтому тогда она сохраняется при завершении или прерывании
+        if isinstance(self._parsed_document, DocumentStream):
+            self._save_progress()
 
-                    if unfilled_doc.abstract is None:
-                        try:
-                            abstract = article.find_element(
-                                By.CLASS_NAME, 'section'
-                            ).find_elements(
-                                By.TAG_NAME, 'ul'
-                            )[0].text
-                            unfilled_doc.abstract = abstract
-                        except:
-                            abstract=None
-
-                    text = article.find_element(By.CLASS_NAME, 'section').text
-                    try:
-                        text += '\n\n' + self._driver.find_element(By.CLASS_NAME, 'footnotes').text
-                    except:
-                        pass
+    def _fill_document_texts(self) -> None:
+        """
+        Waits for the text extraction of the found documents. Extraction of the rejected documents is cancelled
+        """
+        if isinstance(self._parsed_document, DocumentStream):
+            self._parsed_document.flush()
+        else:
+            for doc in self._parsed_document:
+                self._document_text(doc)
+        for doc, text in self._document_texts.values():
+            text.cancel()
+        self._document_texts.clear()
+
+    def _pending_text(self, doc: S3PDocument) -> Future | None:
+        entry = self._document_texts.get(id(doc))
+        return entry[1] if entry is not None else None
+
+    def _document_text(self, doc: S3PDocument) -> None:
+        """
+        Waits for the text extraction of the found document, if it has one
+        """
+        entry = self._document_texts.pop(id(doc), None)
+        if entry is None:
+            return
+        try:
+            doc.text = entry[1].result()
+        except Exception as e:
+            self.logger.error(f'Text extraction of {doc.link} failed: {e}')
+        self._stats.count('fetched' if doc.text is not None else 'failed')
+
+    def _commit_state(self) -> None:
+        """
+        Saves the state of the finished run. The state is not saved when the run fails, so the next run repeats the work
+        """
+        if self._feed_state is not None:
+            if self._feed_complete and not self._feed_gaps:
+                self._feed_state.save(self._state_file('feed.json'))
+            else:
+                self.logger.info(f'RSS feed cursor is kept: {self._feed_gaps} entries failed or the feed is not read to the end')
+        if self._seen is not None:
+            found = self._parsed_document.links if isinstance(self._parsed_document, DocumentStream) else (
+                doc.link for doc in self._parsed_document
+            )
+            self._seen.add(urljoin(self.DOMAIN, link) for link in found)
+            evicted = self._seen.compact()
+            self._seen.commit()
+            self.logger.debug(f'Seen links index updated ({evicted} links evicted)')
+        if self._schedule is not None and self._use_rss:
+            path = self._state_file('cadence.json')
+            cadence = PublishingCadence.load(path)
+            now = self._feed_now()
+            cadence.observe(self._observed, now, self._schedule['history_days'])
+            cadence.checked = now
+            cadence.save(path)
+        if self._revisions is not None:
+            if not isinstance(self._parsed_document, DocumentStream):
+                for doc in self._parsed_document:
+                    self._remember(doc)
+            # Выданные в этом запуске версии страниц заменяют проверенные
+            self._revisions.save([*self._checked.values(), *self._emitted.values()])
+            self._revisions.evict(self._revalidation_since())
+            self._revisions.commit()
+
+    def _revalidation_since(self) -> datetime.datetime:
+        return datetime.datetime.now() - datetime.timedelta(days=self._revalidation['window_days'])
+
+    def _remember(self, doc: S3PDocument) -> None:
+        """
+        Keeps the fingerprint and the validators of the emitted publication page for the revalidation
+        """
+        # Ссылка редакции отличается от ссылки страницы только фрагментом `#revision-N`
+        link = doc.link.split('#', 1)[0]
+        if self._revisions is None or not link.endswith('html') or doc.published is None:
+            return
+        url = urljoin(self.DOMAIN, link)
+        etag, modified, length = self._validators.pop(url, (None, None, None))
+        self._emitted[SeenLinks.normalize(url)] = DocumentRevision(
+            link=link,
+            title=doc.title,
+            published=doc.published,
+            fingerprint=DocumentRevisions.fingerprint(doc.text),
+            etag=etag,
+            modified=modified,
+            length=length,
+            revision=(doc.other or {}).get('revision', 0),
+        )
+
+    def _revalidate(self) -> None:
+        """
+        Sends conditional requests for the recently emitted publication pages (`revalidate` window)
+        and emits again the pages whose text changed, with the revision number in `other`.
+        The link of a revision ends with `#revision-N`, so its `S3PDocument.hash` differs from the emitted page
+        and `SaveOnlyNewDocuments` keeps it. Revised pages go through the restrictions of `_find` like the new ones
+        """
+        if self._revisions is None:
+            return
+        limit = self._restriction.maximum_materials
+        if limit is not None and len(self._parsed_document) >= limit:
+            return
+        found = self._parsed_document.links if isinstance(self._parsed_document, DocumentStream) else (
+            doc.link for doc in self._parsed_document
+        )
+        found = {SeenLinks.normalize(urljoin(self.DOMAIN, link)) for link in found}
+        records = [
+            record for record in self._revisions.recent(self._revalidation_since(), self._revalidation['max_links'])
+            if SeenLinks.normalize(urljoin(self.DOMAIN, record.link)) not in found
+        ]
 
-                    unfilled_doc.text = text
+        with contextlib.closing(ordered_map(self._revalidated, records, self._concurrency)) as checks:
+            for record, future in checks:
+                try:
+                    article = future.result()
+                except CircuitOpen as e:
+                    self.logger.warning(f'Revalidation is stopped: {e}')
+                    break
                 except Exception as e:
-                    self.logger.error(e)
+                    self.logger.debug(f'Revalidation of {record.link} failed: {e}')
+                    continue
+
+                url = urljoin(self.DOMAIN, record.link)
+                if article is None or DocumentRevisions.fingerprint(article.text) == record.fingerprint:
+                    # Страница не изменилась: обновляются только валидаторы и время проверки
+                    record.etag, record.modified, record.length = self._validators.pop(url, (record.etag, record.modified, record.length))
+                    self._checked[SeenLinks.normalize(url)] = record
+                    self._stats.count('unchanged')
+                    continue
+
+                doc = S3PDocument(
+                    id=None,
+                    title=record.title or article.title,
+                    abstract=article.abstract,
+                    text=article.text,
+                    # Хэш документа S3P строится по заголовку, ссылке и дате: без фрагмента редакция считалась бы дублем
+                    link=f'{record.link}#revision-{record.revision + 1}',
+                    storage=None,
+                    other={'category': article.category, 'revision': record.revision + 1},
+                    published=record.published,
+                    loaded=None,
+                )
+                self.logger.info(f'Publication {record.link} is revised (revision {record.revision + 1})')
+                found = len(self._parsed_document)
+                try:
+                    with self._stats.stage('find'):
+                        self._find(doc)
+                except S3PPluginParserOutOfRestrictionException:
+                    self._stats.count('out_of_restriction')
                     continue
+                except S3PPluginParserFinish:
+                    if len(self._parsed_document) > found:
+                        self._stats.count('revised')
+                    break
+                self._stats.count('revised')
+
+    def _revalidated(self, record: DocumentRevision) -> ECBArticle | None:
+        """
+        Conditional request of the emitted page. None when the page is not modified (HTTP 304)
+        """
+        import urllib.error
+
+        url = urljoin(self.DOMAIN, record.link)
+        headers = {name: value for name, value in (('If-None-Match', record.etag), ('If-Modified-Since', record.modified)) if value}
+        try:
+            body = self._governor.call(url, self._http_get, url, 'http', headers)
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+        with self._stats.stage('parse'):
+            article = parse_article(body)
+        if article is None or article.text is None:
+            raise ValueError(f'Web page {url} is not parsed')
+        return article
+
+    def _new_parse(self) -> None:
+        if self._use_async and self._use_http:
+            run_coroutine(self._async_new_parse())
+            return
+
+        # Страницы загружаются заранее в пуле потоков, но в `_find` попадают строго в порядке RSS ленты
+        with contextlib.closing(self._prefetched(self._latest_pubs(), lambda doc: doc.link)) as pubs:
+            for unfilled_doc, prefetched in pubs:
+                self._rss_publication(unfilled_doc, prefetched)
+
+    async def _async_new_parse(self) -> None:
+        """
+        RSS mode on asyncio: the pages are fetched by tasks of one event loop, this coroutine consumes them
+        in the order of the feed. Finishing the parser cancels the outstanding requests.
+        """
+        async with AsyncFetcher(self._concurrency, stats=self._stats, governor=self._governor, transport=self._transport) as fetcher:
+            # Задач запланировано больше, чем одновременных запросов: очередь не простаивает, пока ждем первую страницу
+            pages = async_ordered_map(
+                lambda doc: self._async_article(fetcher, doc.link),
+                self._unseen(self._latest_pubs(), lambda doc: doc.link),
+                self._concurrency * 2,
+            )
+            async with contextlib.aclosing(pages):
+                async for unfilled_doc, prefetched in pages:
+                    self._rss_publication(unfilled_doc, prefetched)
+
+    async def _async_article(self, fetcher: AsyncFetcher, url: str) -> ECBArticle | None:
+        """
+        Asynchronous counterpart of `_http_article`
+        """
+        if not url.endswith('html'):
+            return None
+        try:
+            body, headers = await fetcher.get(url)
+            if self._revisions is not None:
+                self._validators[url] = (headers.get('ETag'), headers.get('Last-Modified'), len(body))
+            with self._stats.stage('parse'):
+                article = parse_article(body)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            self.logger.debug(f'HTTP extraction of {url} failed: {e}')
+            return None
+        if article is None:
+            self.logger.debug(f'Web page {url} is not parsed')
+        else:
+            self._stats.count('fetched')
+        return article
 
-            # В случаях, когда публикация является документом, пока, мы будем их сохранять (текст документов выгрузим чуть позже)
+    def _rss_publication(self, unfilled_doc: S3PDocument, prefetched: ECBArticle | None) -> None:
+        """
+        Fills the publication of the RSS feed and passes it to `_find`
+        """
+        if unfilled_doc.link.endswith('html'):
+            # Если публикация - это web-страница, то мы заходим на нее и собираем все данные
             try:
+                article = self._article(unfilled_doc.link, prefetched)
+
+                if article.category is not None:
+                    # Тут мы создаем словарь потому что до этого его не создавали
+                    unfilled_doc.other = {
+                        'category': article.category,
+                    }
+
+                if unfilled_doc.abstract is None:
+                    unfilled_doc.abstract = article.abstract
+
+                if article.text is None:
+                    raise ValueError(f'Section of the publication {unfilled_doc.link} is not found')
+                unfilled_doc.text = article.text
+            except CircuitOpen:
+                raise
+            except Exception as e:
+                self.logger.error(e)
+                self._stats.count('failed')
+                self._feed_gaps += 1
+                return
+
+        elif self._documents is not None:
+            # Публикация - документ. Его текст извлекается в фоне и заполняется до завершения парсинга
+            self._document_texts[id(unfilled_doc)] = (unfilled_doc, self._documents.submit(unfilled_doc.link))
+
+        try:
+            with self._stats.stage('find'):
                 self._find(unfilled_doc)
-            except S3PPluginParserOutOfRestrictionException as e:
-                if e.restriction == FROM_DATE:
-                    self.logger.debug(f'Document is out of date range `{self._restriction.from_date}`')
-                    raise S3PPluginParserFinish(self._plugin,
-                                                f'Document is out of date range `{self._restriction.from_date}`',
-                                                e)
+        except S3PPluginParserFinish:
+            # Лимит `maximum_materials`: следующие записи ленты не обработаны
+            self._feed_gaps += 1
+            raise
+        except S3PPluginParserOutOfRestrictionException as e:
+            self._stats.count('out_of_restriction')
+            if e.restriction != FROM_DATE:
+                # Публикация новее `to_date`: курсор не должен пройти мимо нее
+                self._feed_gaps += 1
+            else:
+                # Остальные записи старше `from_date`: новые записи ленты обработаны
+                self._feed_complete = True
+                # Остановка парсера отменяет загрузку страниц, которые уже не нужны
+                self.logger.debug(f'Document is out of date range `{self._restriction.from_date}`')
+                raise S3PPluginParserFinish(self._plugin,
+                                            f'Document is out of date range `{self._restriction.from_date}`',
+                                            e)
 
     def _old_parser(self) -> None:
-        self._driver.get(self.HOST)
-        time.sleep(5)
+        # Записи индекса обрабатываются по мере подгрузки, не дожидаясь загрузки всего архива
+        index = self._fragment_entries() if self._use_fragments else self._index_entries()
+        rejected = self._rejected
 
-        try:
-            self._driver.find_elements(By.XPATH, "//a[contains(text(),'I understand and I accept')]")[0].click()
-            time.sleep(0.5)
-        except:
-            pass
+        def processed(record: tuple[IndexEntry, int, str], doc: S3PDocument) -> None:
+            if self._rejected > rejected:
+                # Контрольная точка не проходит дальше неудачной записи, чтобы следующий запуск ее повторил
+                return
+            entry, position, links_hash = record
+            self._progress = BackfillCheckpoint(self._backfill_scope(), position, links_hash, entry.link, doc.published)
+            self._progressed()
 
-        lazy_load = self._driver.find_element(By.CLASS_NAME, 'lazy-load-hit')
+        self._crawl(self._resumed(index), lambda record: record[0], processed)
+        self.logger.debug('Section parse error')
 
+    def _sharded_backfill(self) -> None:
+        """
+        Processes the backfill shards leased by this worker, the newest first, until no pending shard is left.
+        Shards intersect the date restrictions. Every publication belongs to one shard by its index date
+        """
+        ranges = [
+            (datetime.date.fromisoformat(start), datetime.date.fromisoformat(end))
+            for start, end in self._backfill.get('ranges') or ()
+        ] or [(datetime.date(year, 1, 1), datetime.date(year, 12, 31)) for year in self._years]
+        self._shards.plan(BackfillShards.split(ranges, self._backfill.get('period', 'month')))
+
+        from_date, to_date = self._restriction.from_date, self._restriction.to_date
+        while (shard := self._shards.acquire(from_date and from_date.date(), to_date and to_date.date())) is not None:
+            self.logger.info(f'Backfill shard {shard.key} is leased, {shard.position} index records are already processed')
+            self._shard_started.setdefault(shard.key, shard.position)
+            entries = self._shard_entries(shard)
+            rejected = self._rejected
+
+            def processed(record: tuple[int, IndexEntry], doc: S3PDocument, key: str = shard.key) -> None:
+                # Позиция части не проходит дальше неудачной записи, чтобы следующий запуск ее повторил
+                if self._rejected == rejected:
+                    self._shard_progress[key] = (record[0], False)
+                self._shards.renew()
+                self._progressed()
+
+            self._crawl(itertools.islice(enumerate(entries, start=1), shard.position, None), lambda record: record[1], processed)
+            if self._rejected > rejected:
+                # Часть остается арендованной этим запуском до его конца, поэтому повторно в нем не берется
+                self.logger.warning(f'Backfill shard {shard.key} is kept pending: {self._rejected - rejected} publications failed')
+                continue
+            self._shard_progress[shard.key] = (len(entries), True)
+            self._progressed()
+            self.logger.info(f'Backfill shard {shard.key} is done ({len(entries)} index records)')
+
+    def _shard_entries(self, shard: BackfillShard) -> list[IndexEntry]:
+        """
+        Records of the publications index that belong to the shard and satisfy the date restrictions
+        """
+        year = shard.start.year
+        # Части за месяцы одного года используют один загруженный фрагмент индекса
+        if self._shard_index is None or self._shard_index[0] != year:
+            self._shard_index = (year, self._index_fragment(year))
+        from_date, to_date = self._restriction.from_date, self._restriction.to_date
+        return [
+            entry for entry in self._shard_index[1]
+            if entry.published is not None and shard.start <= entry.published.date() <= shard.end
+            and (from_date is None or entry.published >= from_date) and (to_date is None or entry.published <= to_date)
+        ]
+
+    def _crawl(self, records: Iterable[T], entry_of: Callable[[T], IndexEntry], processed: Callable[[T, S3PDocument], None]) -> None:
+        """
+        Loads the publication pages of the index records and hands the publications to `_find`.
+        `processed` is called for every record whose publication was handed to `_find`
+        """
+        with contextlib.closing(self._prefetched(records, lambda record: urljoin(self.DOMAIN, entry_of(record).link))) as pubs:
+            for record, prefetched in pubs:
+                entry = entry_of(record)
+                web_link = entry.link
+
+                if web_link.endswith('html'):
+                    try:
+                        article = self._article(urljoin(self.DOMAIN, web_link), prefetched)
+                        # Если на странице нет заголовка или даты, то берем их из записи индекса
+                        title = article.title or entry.title
+                        published = article.published or entry.published
+                        if title is None or published is None or article.text is None:
+                            raise ValueError(f'Publication {web_link} is not parsed')
+
+                        doc = S3PDocument(
+                            id=None,
+                            title=title,
+                            abstract=article.abstract,
+                            text=article.text,
+                            link=web_link,
+                            storage=None,
+                            other={'category': article.category},
+                            published=published.replace(tzinfo=None),
+                            loaded=None,
+                        )
+                    except CircuitOpen:
+                        raise
+                    except Exception as e:
+                        if (self._checkpoint_path is not None or self._shards is not None) and isinstance(e, interruption_errors()):
+                            # Сайт или браузер недоступны: обход прерывается, и следующий запуск продолжит с этой записи
+                            raise
+                        self.logger.error(e)
+                        self._rejected += 1
+                        self._stats.count('failed')
+                        continue
+                    else:
+                        found = len(self._parsed_document)
+                        try:
+                            with self._stats.stage('find'):
+                                self._find(doc)
+                        except S3PPluginParserOutOfRestrictionException as e:
+                            self._stats.count('out_of_restriction')
+                            if e.restriction == FROM_DATE:
+                                self.logger.debug(f'Document is out of date range `{self._restriction.from_date}`')
+                                raise S3PPluginParserFinish(self._plugin,
+                                                            f'Document is out of date range `{self._restriction.from_date}`',
+                                                            e)
+                        except S3PPluginParserFinish:
+                            # Последний нужный документ тоже передан в `_find`
+                            if len(self._parsed_document) > found:
+                                processed(record, doc)
+                            raise
+                        processed(record, doc)
+
+    def _resumed(self, index: Iterable[IndexEntry]) -> Iterator[tuple[IndexEntry, int, str]]:
+        """
+        Numbers the index records and hashes their links. When the previous crawl was interrupted, the records
+        up to its checkpoint are skipped before any page is loaded.
+        Yields `(entry, position, links_hash)`
+        """
+        checkpoint = self._checkpoint
+        links = hashlib.blake2b(digest_size=16)
+        skipped: list[tuple[IndexEntry, int, str]] = []
+        for position, entry in enumerate(index, start=1):
+            links.update(entry.link.encode() + b'\n')
+            record = (entry, position, links.hexdigest())
+            if checkpoint is None:
+                yield record
+                continue
+            if entry.link != checkpoint.link:
+                skipped.append(record)
+                continue
+            if position != checkpoint.position or record[2] != checkpoint.links_hash:
+                # Индекс изменился с прошлого запуска (например, добавлены новые публикации).
+                # Новые публикации забирают регулярные запуски, обход продолжается после последней обработанной
+                self.logger.info(f'Publications index changed since the checkpoint ({checkpoint.position} -> {position})')
+            self.logger.info(f'Backfill resumes after {checkpoint.link} ({position} index records skipped)')
+            self._stats.count('skipped', len(skipped) + 1)
+            checkpoint = None
+            skipped.clear()
+        if checkpoint is not None and skipped:
+            # Публикации контрольной точки больше нет в индексе: обход начинается сначала
+            self.logger.info(f'Backfill checkpoint {checkpoint.link} is not in the index, the crawl starts over')
+            yield from skipped
+
+    def _index_entries(self) -> Iterator[IndexEntry]:
+        """
+        Streams the records of the lazy-loaded publications index.
+
+        After each lazy-load step only the newly added records are read from the page and yielded,
+        the publication pages are opened in a separate browser tab, so the index stays loaded.
+        """
+        from selenium.webdriver.common.by import By
+
+        with self._stats.stage('browser'):
+            self._navigate(self.HOST)
+            self._index_window = self._driver.current_window_handle
+            self._waits.index()
+            self._waits.consent()
+
+        lazy_load = self._driver.find_element(By.CLASS_NAME, 'lazy-load-hit')
 
         # Теперь на сайте один контейнер со всеми публикациями
         dl_wrapper = self._driver.find_element(By.CLASS_NAME, 'dl-wrapper')
 
-        height_dl_wrapper = 0
-
+        parser = IndexParser()
+        offset = 0
+        candidates = 0
+        oldest: datetime.datetime | None = None
         while True:
+            self._switch_to_index()
+            with self._stats.stage('index'):
+                offset, chunk = self._driver.execute_script(self.INDEX_CHUNK_SCRIPT, dl_wrapper, offset)
+                entries = parser.feed(chunk)
+            self.logger.debug(f'Loaded {len(entries)} new records of the publications index')
+            for entry in entries:
+                candidates += self._is_candidate(entry)
+                if entry.published is not None and (oldest is None or entry.published < oldest):
+                    oldest = entry.published
+            yield from entries
+
+            if self._index_covers_restrictions(candidates, oldest):
+                break
+
             # Прокрутка страницы до конца
             try:
-
-                self._driver.execute_script("arguments[0].scrollIntoView();", lazy_load)
-                time.sleep(0.1)
-                # Проверка. Если появятся новые записи, то высота контента изменится
-                # ! Можно оценивать количество элементов.
-                if dl_wrapper.size['height'] > height_dl_wrapper:
-                    height_dl_wrapper = dl_wrapper.size['height']
-                    time.sleep(1)
-                else:
+                self._switch_to_index()
+                with self._stats.stage('browser'):
+                    size = self._waits.index_size(dl_wrapper)
+                    self._driver.execute_script("arguments[0].scrollIntoView();", lazy_load)
+                    # Проверка. Если появятся новые записи, то количество элементов изменится
+                    grown = self._waits.growth(dl_wrapper, size)
+                if grown is None:
                     break
             except Exception as e:
+                self.logger.debug(f'Index scrolling stopped: {e}')
                 break
 
-        soup = BeautifulSoup(self._driver.page_source, 'html.parser')
-        els = soup.find('div', class_='sort-wrapper').find('dl').find_all('dd')
+    def _fragment_entries(self) -> Iterator[IndexEntry]:
+        """
+        Streams the records of the publications index from the per-year index fragments.
+
+        Fragments of all `years` inside the date restrictions are downloaded in parallel over HTTP
+        and yielded from the newest year to the oldest. Falls back to the browser index when no fragment is loaded.
+        """
+        years = [
+            year for year in self._years
+            if (self._restriction.from_date is None or year >= self._restriction.from_date.year)
+            and (self._restriction.to_date is None or year <= self._restriction.to_date.year)
+        ]
 
-        web_links = []
+        loaded = False
+        with contextlib.closing(ordered_map(self._index_fragment, years, max(len(years), 1))) as fragments:
+            for year, future in fragments:
+                try:
+                    entries = future.result()
+                except CircuitOpen:
+                    raise
+                except Exception as e:
+                    self.logger.error(f'Index fragment of {year} is not loaded: {e}')
+                    continue
+                loaded = True
+                self.logger.debug(f'Loaded {len(entries)} records of the publications index for {year}')
+                yield from entries
 
-        for el in els:
-            try:
-                web_links.append(el.find('div').find('div', class_='title').find('a')['href'])
-            except:
-                pass
+        if not loaded and years:
+            self.logger.debug('Fallback to the browser publications index')
+            yield from self._index_entries()
 
-        for web_link in web_links:
+    def _index_fragment(self, year: int) -> list[IndexEntry]:
+        url = urljoin(self.DOMAIN, self.INDEX_FRAGMENT.format(year=year))
+        body = self._governor.call(url, self._http_get, url, 'index')
+        with self._stats.stage('parse'):
+            return IndexParser().feed(body.decode('utf-8'))
 
-            if web_link.endswith('html'):
-                try:
+    def _is_candidate(self, entry: IndexEntry) -> bool:
+        """Record may become a document: it is a web page that is not newer than `to_date`"""
+        if not entry.link.endswith('html'):
+            return False
+        return self._restriction.to_date is None or entry.published is None or entry.published <= self._restriction.to_date
 
-                    url = self.DOMAIN+web_link
-                    self._driver.get(url)
-                    self.logger.debug('Entered on web page ' + url)
-                    time.sleep(2)
+    def _index_covers_restrictions(self, candidates: int, oldest: datetime.datetime | None) -> bool:
+        """
+        Checks whether the loaded index records already satisfy the restrictions, so the next lazy-load pages are not needed:
+        the oldest record is older than `from_date` or there are enough candidates for `maximum_materials`.
+        """
+        if self._restriction.from_date is not None and oldest is not None and oldest < self._restriction.from_date:
+            self.logger.debug(f'Publications index reached `{self._restriction.from_date}`')
+            return True
 
-                    article = self._driver.find_element(By.TAG_NAME, 'main')
-                    title = article.find_element(By.XPATH, ".//div[@class='title']//h1").text
-                    try:
-                        category = article.find_element(By.XPATH, ".//div[@class='title']//ul/li").text
-                    except:
-                        category = None
-                    pub_date = dateutil.parser.parse(
-                        article.find_element(By.CLASS_NAME, 'ecb-publicationDate').text)
-                    text = article.find_element(By.CLASS_NAME, 'section').text
-                    try:
-                        abstract = article.find_element(By.CLASS_NAME, 'section').find_elements(By.TAG_NAME, 'ul')[
-                        0].text
-                    except:
-                        abstract=None
-                    try:
-                        text += '\n\n' + self._driver.find_element(By.CLASS_NAME, 'footnotes').text
-                    except:
-                        pass
-
-                    doc = S3PDocument(
-                        id=None,
-                        title=title,
-                        abstract=abstract,
-                        text=text,
-                        link=web_link,
-                        storage=None,
-                        other={'category': category},
-                        published=pub_date.replace(tzinfo=None),
-                        loaded=None,
-                    )
-                except Exception as e:
-                    self.logger.error(e)
-                    continue
-                else:
-                    try:
-                        self._find(doc)
-                    except S3PPluginParserOutOfRestrictionException as e:
-                        if e.restriction == FROM_DATE:
-                            self.logger.debug(f'Document is out of date range `{self._restriction.from_date}`')
-                            raise S3PPluginParserFinish(self._plugin,
-                                                        f'Document is out of date range `{self._restriction.from_date}`',
-                                                        e)
+        # Публикации, которые не удалось загрузить, не считаются кандидатами
+        if self._restriction.maximum_materials is not None and candidates - self._rejected >= self._restriction.maximum_materials:
+            self.logger.debug(f'Publications index has enough candidates for {self._restriction.maximum_materials} materials')
+            return True
+        return False
+
+    def _release_windows(self) -> None:
+        """
+        Closes the tab of the publication pages and returns to the index tab, the web driver is shared with other plugins
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        if self._article_window is None:
+            return
+        try:
+            self._driver.switch_to.window(self._article_window)
+            self._driver.close()
+            self._driver.switch_to.window(self._index_window)
+        except WebDriverException as e:
+            self.logger.debug(f'Tab of the publication pages is not closed: {e}')
+        self._article_window = None
+
+    def _switch_to_index(self) -> None:
+        if self._driver.current_window_handle != self._index_window:
+            self._driver.switch_to.window(self._index_window)
+
+    def _prefetched(self, items: Iterable[T], url_of: Callable[[T], str]) -> Iterator[tuple[T, ECBArticle | None]]:
+        """
+        Downloads and parses the pages of `items` over HTTP in a bounded worker pool (`concurrency`).
+        Yields `(item, article)` in the original order. `article` is None when the page must be loaded by the web driver.
+        """
+        unseen = self._unseen(items, url_of)
+        if not self._use_http and self._browser_tabs > 1:
+            # Без HTTP страницы загружаются параллельно во вкладках браузера
+            def read(url: str) -> ECBArticle:
+                article = self._read_article(url)
+                self._stats.count('fetched')
+                return article
+
+            pool = TabPool(self._driver, self._waits, self._browser_tabs, self._lean, self._governor)
+            with contextlib.closing(pool.map(unseen, url_of, read)) as pages:
+                yield from pages
+            return
+
+        with contextlib.closing(ordered_map(lambda item: self._http_article(url_of(item)), unseen, self._concurrency)) as pages:
+            for item, future in pages:
+                yield item, future.result()
+
+    def _unseen(self, items: Iterable[T], url_of: Callable[[T], str]) -> Iterator[T]:
+        """
+        Skips the publications ingested by the previous runs before any page is fetched
+        """
+        for item in items:
+            if self._seen is not None and url_of(item) in self._seen:
+                self.logger.debug(f'Publication {url_of(item)} is already ingested')
+                self._stats.count('skipped')
+                continue
+            yield item
+
+    def _http_article(self, url: str) -> ECBArticle | None:
+        """
+        Thread-safe part of the page loading: plain HTTP download and parsing
+        """
+        if not self._use_http or not url.endswith('html'):
+            return None
+        try:
+            body = self._governor.call(url, self._http_get, url, 'http')
+            with self._stats.stage('parse'):
+                article = parse_article(body)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            self.logger.debug(f'HTTP extraction of {url} failed: {e}')
+            return None
+        if article is None:
+            self.logger.debug(f'Web page {url} is not parsed')
+        else:
+            self._stats.count('fetched')
+        return article
+
+    def _http_get(self, url: str, stage: str, headers: dict[str, str] | None = None) -> bytes:
+        """
+        One attempt of the download, timed as `stage`
+        """
+        with self._stats.stage(stage):
+            with self._transport.get(url, headers) as response:
+                body = response.read()
+        self._stats.count('bytes', len(body))
+        if self._revisions is not None:
+            self._validators[url] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), len(body))
+        return body
+
+    def _article(self, url: str, prefetched: ECBArticle | None = None) -> ECBArticle:
+        """
+        Returns the publication page fields. Uses the page prefetched over HTTP and falls back to the web driver
+        when the page could not be fetched or parsed.
+        """
+        if prefetched is not None:
+            self.logger.debug('Fetched web page ' + url)
+            return prefetched
+        if self._use_http:
+            self.logger.debug('Fallback to the web driver for ' + url)
+        return self._driver_article(url)
 
+    def _navigate(self, url: str) -> None:
+        if self._lean is not None and self._lean.supported:
+            self._lean.get(url)
         else:
-            self.logger.debug('Section parse error')
+            self._driver.get(url)
+
+    def _driver_article(self, url: str) -> ECBArticle:
+        if self._index_window is not None:
+            # Индекс публикаций остается открытым в своей вкладке, публикации открываются в отдельной
+            if self._article_window is None:
+                self._driver.switch_to.new_window('tab')
+                self._article_window = self._driver.current_window_handle
+            elif self._driver.current_window_handle != self._article_window:
+                self._driver.switch_to.window(self._article_window)
+        from selenium.common.exceptions import TimeoutException
+
+        try:
+            with self._stats.stage('browser'):
+                # Загрузки страниц браузером идут по тем же правилам, что HTTP запросы: лимит хоста, повторы и предохранитель
+                self._governor.call(url, self._load_page, url)
+        except TimeoutException as e:
+            raise ValueError(f'Web page {url} is not loaded: {e}') from e
+
+        article = self._read_article(url)
+        self._stats.count('fetched')
+        return article
+
+    def _load_page(self, url: str) -> None:
+        """
+        Opens the publication in the current tab. A page without `main` is not loaded and raises `TimeoutException`
+        """
+        from selenium.common.exceptions import TimeoutException
+
+        self._navigate(url)
+        self.logger.debug('Entered on web page ' + url)
+        if self._waits.main() is None:
+            raise TimeoutException(f'Web page {url} has no `main` element')
+        self._waits.section()
+
+    def _read_article(self, url: str) -> ECBArticle:
+        """
+        Reads the publication opened in the current tab
+        """
+        # Все поля публикации забираются одним вызовом WebDriver и разбираются тем же парсером, что и страницы из HTTP
+        with self._stats.stage('extract'):
+            main, footnotes = self._driver.execute_script(self.ARTICLE_SCRIPT)
+        if main is None:
+            raise ValueError(f'Web page {url} has no `main` element')
+        with self._stats.stage('parse'):
+            article = parse_article(main + (footnotes or ''))
+        if article is None:
+            raise ValueError(f'Section of the publication {url} is not found')
+        return article
 
     def _latest_pubs(self) -> Iterator[S3PDocument]:
-        # Parse the ECB RSS feed
-        ecb_feed = feedparser.parse(self.RSS)
-
-        # Iterate through feed entries
-        for entry in ecb_feed.entries:
-            parsed_date = dateutil.parser.parse(entry.published)
-            yield S3PDocument(
-                None,
-                entry.title,
-                entry.summary if 'summary' in entry else None,
-                None,
-                entry.link,
-                None,
-                None,
-                parsed_date.replace(tzinfo=None),
-                None,
-            )
+        state_path = self._state_file('feed.json')
+        state = FeedState.load(state_path) if state_path else FeedState()
+
+        # Validators of the previous run make the request conditional
+        feed = FeedReader(self.RSS, etag=state.etag, modified=state.modified, governor=self._governor, transport=self._transport)
+        with self._stats.stage('feed'):
+            modified = feed.open()
+        if not modified:
+            self.logger.info('RSS feed is not modified since the previous run')
+            return
+        self._stats.count('bytes', feed.size)
+
+        cursor = FeedState(etag=feed.etag, modified=feed.modified, published=state.published, link=state.link)
+        if state_path:
+            # Курсор обновляется по мере чтения и сохраняется только после успешного запуска, обработавшего все новые записи
+            self._feed_state = cursor
+
+        # The feed is read item by item. Items go from the newest to the oldest,
+        # so the reading stops at the newest item of the previous run
+        found = 0
+        with contextlib.closing(feed):
+            for item in feed.items():
+                if item.link is None or item.published is None:
+                    self.logger.debug(f'RSS item {item.title} has no link or publication date')
+                    continue
+                self._observed.append(item.published)
+                if not state.is_newer(item.published, item.link):
+                    self.logger.debug(f'RSS feed reached the publication of the previous run {item.link}')
+                    self._stats.count('skipped')
+                    break
+                if not found or item.published > cursor.published:
+                    cursor.published, cursor.link = item.published, item.link
+                found += 1
+                yield S3PDocument(
+                    None,
+                    item.title,
+                    item.summary,
+                    None,
+                    item.link,
+                    None,
+                    None,
+                    item.published,
+                    None,
+                )
+        # Лента прочитана до курсора прошлого запуска или до конца
+        self._feed_complete = True
+
+        if not found:
+            self.logger.info(f'RSS feed has no entries newer than {state.published}')
 
     def _select_year(self, xpath, value):
         """
         Выбирает один пункт из раскрывающегося списка по его xpath
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as ec
+        from selenium.webdriver.support.ui import WebDriverWait
+
         try:
             select = self._driver.find_element(By.XPATH, xpath)
             options = select.find_elements(By.TAG_NAME, 'option')
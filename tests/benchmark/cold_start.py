@@ -0,0 +1,44 @@
+"""
+Cold start of the ECB payload.
+
+The platform loads `ecb.py` by its path for every task, so the scenario does the same in a fresh process
+and reports the import time and the heavy dependencies that were loaded by the import.
+The SDK modules used by `ecb.py` are imported first and timed separately: `import_ratio` - the load time of `ecb.py`
+in units of the SDK import on the same machine:
+
+    python -m tests.benchmark.cold_start
+"""
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+PAYLOAD = Path(__file__).parent.parent.parent / 'src' / 's3p_plugin_parser_ecb' / 'ecb.py'
+# Зависимости, которые нужны только отдельным режимам работы парсера
+# Модули SDK, которые импортирует `ecb.py`: эталон времени импорта на этой машине
+SDK_MODULES = ('s3p_sdk.plugin.payloads.parsers', 's3p_sdk.exceptions.parser', 's3p_sdk.types', 's3p_sdk.types.plugin_restrictions')
+HEAVY_MODULES = ('selenium', 'bs4', 'lxml', 'feedparser', 'dateutil', 'aiohttp', 'asyncio', 'urllib.request', 'multiprocessing', 'pypdf')
+
+
+def run() -> dict:
+    started = time.perf_counter()
+    for name in SDK_MODULES:
+        importlib.import_module(name)
+    sdk_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location('ecb', PAYLOAD)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    seconds = time.perf_counter() - started
+    return {
+        'import_ms': round(seconds * 1000, 1),
+        'sdk_import_ms': round(sdk_seconds * 1000, 1),
+        'import_ratio': round(seconds / sdk_seconds, 2),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run()))
@@ -0,0 +1,94 @@
+"""
+Parsing of a large publications index snapshot.
+
+The index is generated from the records of the recorded `pub/pubbydate/html/index.en.html` page
+(`records` publication records, a date record for every three of them). Engines:
+
+* `stream` - `IndexParser`, one pass of the `html.parser` tokenizer over the `sort-wrapper` records;
+* `tree` - the former approach: a BeautifulSoup tree of the whole page and nested `find` calls for every `dd`.
+
+Every engine runs in its own process, so the peak RSS belongs to it:
+
+    python -m tests.benchmark.index_parse stream --records 20000
+
+and prints a JSON report: parse time, records, the growth of the peak RSS during parsing and a digest of the records.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import resource
+import time
+
+from src.s3p_plugin_parser_ecb.ecb import HTML_PARSER, IndexEntry, IndexParser, element_text
+from tests.fixtures.local_site import SITE_ROOT
+
+ENGINES = ('stream', 'tree')
+FIRST_DATE = datetime.date(2025, 12, 31)
+
+
+def build_index(records: int) -> str:
+    page = (SITE_ROOT / 'pub' / 'pubbydate' / 'html' / 'index.en.html').read_text(encoding='utf-8')
+    head, rest = page.split('<dl>', 1)
+    tail = rest.split('</dl>', 1)[1]
+    items = []
+    for i in range(records):
+        if i % 3 == 0:
+            day = FIRST_DATE - datetime.timedelta(days=i // 3)
+            items.append(f'<dt isodate="{day.isoformat()}"><div class="date">{day:%d %B %Y}</div></dt>')
+        items.append(
+            f'<dd><div class="ecb-langSelector"><div class="category">Economic Bulletin Article</div>'
+            f'<div class="title"><a href="/pub/economic-bulletin/articles/2025/html/ecb.bench{i:06d}.en.html">'
+            f'Wage growth &amp; the labour market, part {i}</a></div>'
+            f'<div class="authors"><ul><li>Jane Doe</li><li>John Roe</li></ul></div></div></dd>'
+        )
+    return head + '<dl>' + '\n'.join(items) + '</dl>' + tail
+
+
+def tree_entries(html: str) -> list[IndexEntry]:
+    """Разбор через дерево BeautifulSoup всей страницы, как до потокового `IndexParser`"""
+    from bs4 import BeautifulSoup
+
+    entries = []
+    date = None
+    dl = BeautifulSoup(html, HTML_PARSER).find('div', class_='sort-wrapper').find('dl')
+    for el in dl.find_all(['dt', 'dd']):
+        if el.name == 'dt':
+            date = datetime.datetime.fromisoformat(el['isodate'])
+            continue
+        title = el.find('div').find('div', class_='title').find('a')
+        category = el.find('div', class_='category')
+        entries.append(IndexEntry(title['href'], element_text(title) or None, date, element_text(category)))
+    return entries
+
+
+def digest(entries: list[IndexEntry]) -> str:
+    content = hashlib.sha256()
+    for entry in entries:
+        content.update(repr((entry.link, entry.title, entry.published, entry.type)).encode())
+    return content.hexdigest()[:16]
+
+
+def run(engine: str, records: int) -> dict:
+    html = build_index(records)
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    entries = IndexParser().feed(html) if engine == 'stream' else tree_entries(html)
+    seconds = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'engine': engine,
+        'records': len(entries),
+        'index_mb': round(len(html) / 1024 / 1024, 1),
+        'seconds': round(seconds, 3),
+        'peak_growth_mb': round((peak - before) / 1024, 1),
+        'digest': digest(entries),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('engine', choices=ENGINES)
+    parser.add_argument('--records', type=int, default=20000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.engine, args.records)))
@@ -0,0 +1,159 @@
+"""
+Offline benchmark of the ECB payload.
+
+A copy of the ECB site is generated from the recorded pages of `tests/fixtures/ecb_site`
+(RSS feed, publication pages, index fragments and a PDF) and served by a local HTTP server.
+`ECB.RSS`, `ECB.HOST` and `ECB.DOMAIN` point to that server.
+
+The scenario runs in its own process, so the peak RSS belongs to one run:
+
+    python -m tests.benchmark.scenario rss --pages 60 --latency 0.02 --concurrency 8
+
+and prints a JSON report: documents per second, latency percentiles of the stages (from the run metrics)
+and peak RSS. `--concurrency 1` is the serial download, the reference path for the speedup of the pool.
+
+Absolute values depend on the machine, so the report also has values relative to the same process:
+`work_per_page` - CPU time of the run per document in units of a fixed reference workload (`reference_seconds`),
+`rss_growth_mb` - growth of the peak RSS during the run.
+"""
+import argparse
+import datetime
+import json
+import re
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from s3p_sdk.plugin.types import SOURCE
+from s3p_sdk.types import S3PRefer, S3PPlugin, S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import ECB
+from tests.fixtures.local_site import LocalSite, SITE_ROOT, ECB_DOMAIN
+
+# `rss-async` - режим RSS на asyncio (`use_async=1`)
+MODES = ('rss', 'rss-async', 'index')
+
+ARTICLE = 'pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'
+PDF = '/pub/pdf/scpwps/ecb.wp3001~9f8e7d6c5b.en.pdf'
+FIRST_DATE = datetime.datetime(2025, 12, 31, 9)
+
+
+def page_path(i: int) -> str:
+    return f'/pub/economic-bulletin/articles/2025/html/ecb.bench{i:04d}.en.html'
+
+
+def build_site(root: Path, pages: int) -> None:
+    """Recorded site with `pages` publication pages and one PDF document"""
+    shutil.copytree(SITE_ROOT, root, dirs_exist_ok=True)
+    article = (SITE_ROOT / ARTICLE).read_text(encoding='utf-8')
+
+    items = []
+    records = []
+    for i in range(pages):
+        published = FIRST_DATE - datetime.timedelta(days=i)
+        title = f'Wage growth and the labour market, part {i}'
+        (root / page_path(i).lstrip('/')).write_text(
+            article.replace('Wage growth and the labour market', title).replace('23 January 2025', published.strftime('%d %B %Y')),
+            encoding='utf-8',
+        )
+        items.append((title, page_path(i), published))
+        if i == pages // 2:
+            items.append(('Working paper', PDF, published))
+
+    for title, path, published in items:
+        records.append(
+            f'<dt isodate="{published.date().isoformat()}"><div class="date">{published:%d %B %Y}</div></dt>'
+            f'<dd><div><div class="category">Economic Bulletin Article</div>'
+            f'<div class="title"><a href="{path}">{title}</a></div></div></dd>'
+        )
+    (root / 'pub/pubbydate/2025/html/index_include.en.html').write_text('<dl>' + ''.join(records) + '</dl>', encoding='utf-8')
+
+    rss_items = ''.join(
+        f'<item><title>{title}</title><link>{ECB_DOMAIN}{path}</link>'
+        f'<pubDate>{published:%a, %d %b %Y %H:%M:%S} +0100</pubDate></item>'
+        for title, path, published in items
+    )
+    (root / 'rss/pub.html').write_text(
+        f'<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>ECB</title>{rss_items}</channel></rss>',
+        encoding='utf-8',
+    )
+
+
+def reference_seconds() -> float:
+    """CPU time of a fixed pure Python workload (strings, JSON, regular expressions): the unit of work on this machine"""
+    started = time.process_time()
+    text = ' '.join(f'word{i}' for i in range(200_000))
+    json.loads(json.dumps(text.split()))
+    re.findall(r'word\d+7\b', text)
+    return time.process_time() - started
+
+
+def run(mode: str, pages: int, latency: float, concurrency: int = 8) -> dict:
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as tmp:
+        build_site(Path(tmp) / 'site', pages)
+        site = LocalSite(Path(tmp) / 'site', latency=latency).start()
+        metrics = Path(tmp) / 'metrics.json'
+
+        class BenchmarkECB(ECB):
+            RSS = site.url('/rss/pub.html')
+            HOST = site.url('/pub/pubbydate/html/index.en.html')
+            DOMAIN = site.domain
+
+        payload = BenchmarkECB(
+            refer=S3PRefer(1, 'benchmark', SOURCE, None),
+            plugin=S3PPlugin(1, 'benchmark/repo/1', True, None, None, SOURCE, "3.0"),
+            restrictions=S3PPluginRestrictions(None, None, None, None),
+            web_driver=None,
+            use_rss=int(mode.startswith('rss')),
+            use_async=int(mode == 'rss-async'),
+            use_http=1,
+            concurrency=concurrency,
+            use_fragments=1,
+            years=[2025],
+            extract_documents=1,
+            metrics_path=str(metrics),
+        )
+        try:
+            started, cpu_started = time.perf_counter(), time.process_time()
+            docs = payload.content()
+            seconds, cpu_seconds = time.perf_counter() - started, time.process_time() - cpu_started
+        finally:
+            site.stop()
+        summary = json.loads(metrics.read_text())
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Эталонная нагрузка выполняется после запуска, чтобы не попасть в пиковую память
+    reference = reference_seconds()
+
+    return {
+        'mode': mode,
+        'pages': pages,
+        'latency': latency,
+        'concurrency': concurrency,
+        'docs': len(docs),
+        'seconds': round(seconds, 3),
+        'docs_per_second': round(len(docs) / seconds, 2),
+        # Перцентили этапов из метрик запуска, в миллисекундах
+        'stages': {
+            stage: {key: round(values[key] * 1000, 2) for key in ('p50', 'p95', 'p99')}
+            for stage, values in summary['stages'].items()
+        },
+        'counters': summary['counters'],
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        'rss_growth_mb': round((peak_rss - rss_before) / 1024, 1),
+        'cpu_seconds': round(cpu_seconds, 3),
+        'reference_seconds': round(reference, 3),
+        'work_per_page': round(cpu_seconds / max(len(docs), 1) / reference, 4),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('mode', choices=MODES)
+    parser.add_argument('--pages', type=int, default=60)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps(run(args.mode, args.pages, args.latency, args.concurrency)))
@@ -0,0 +1,71 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.benchmark.scenario import MODES
+
+ROOT = Path(__file__).parent.parent.parent
+BASELINE = json.loads((Path(__file__).parent / 'baseline.json').read_text())
+
+
+def run_scenario(module: str, *args: str) -> dict:
+    """Каждый сценарий запускается в отдельном процессе, чтобы время импорта и пиковая память относились только к нему"""
+    output = subprocess.run(
+        [sys.executable, '-m', module, *args], cwd=ROOT, capture_output=True, text=True, check=True, timeout=90,
+    ).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2))
+    return report
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('mode', MODES)
+def test_benchmark(mode):
+    """
+    Параллельная загрузка быстрее последовательной (`concurrency=1`) на той же машине в том же запуске.
+    Работа на документ (в единицах эталонной нагрузки того же процесса) и рост пиковой памяти за запуск
+    не хуже сохраненных значений с учетом допуска. Документы в секунду и перцентили этапов зависят от машины
+    и только выводятся в отчет.
+    """
+    baseline = BASELINE['modes'][mode]
+    tolerance = BASELINE['tolerance']
+    parallel, serial = (
+        run_scenario('tests.benchmark.scenario', mode, '--pages', str(BASELINE['pages']), '--latency', str(BASELINE['latency']),
+                     '--concurrency', str(concurrency))
+        for concurrency in (BASELINE['concurrency'], 1)
+    )
+
+    assert parallel['docs'] == serial['docs'] == baseline['docs']
+    assert parallel['docs_per_second'] >= serial['docs_per_second'] * BASELINE['min_speedup']
+    assert parallel['work_per_page'] <= baseline['work_per_page'] * (1 + tolerance['work'])
+    assert parallel['rss_growth_mb'] <= baseline['rss_growth_mb'] * (1 + tolerance['memory'])
+
+
+@pytest.mark.benchmark
+def test_cold_start():
+    """
+    Загрузка `ecb.py` не импортирует зависимости отдельных режимов, а ее время относительно импорта SDK
+    в том же процессе не хуже сохраненного с учетом допуска
+    """
+    report = run_scenario('tests.benchmark.cold_start')
+    assert report['heavy_modules'] == [], f'Imported at load time: {report["heavy_modules"]}'
+    assert report['import_ratio'] <= BASELINE['cold_start']['import_ratio'] * (1 + BASELINE['tolerance']['import'])
+
+
+@pytest.mark.benchmark
+def test_index_parse():
+    """
+    Потоковый разбор большого индекса дает те же записи, что дерево BeautifulSoup, в том же запуске быстрее него
+    и с ростом пиковой памяти меньше размера самого индекса
+    """
+    baseline = BASELINE['index_parse']
+    stream, tree = (
+        run_scenario('tests.benchmark.index_parse', engine, '--records', str(baseline['records'])) for engine in ('stream', 'tree')
+    )
+    assert stream['records'] == tree['records'] == baseline['records']
+    assert stream['digest'] == tree['digest']
+    assert tree['seconds'] / stream['seconds'] >= baseline['min_speedup']
+    assert stream['peak_growth_mb'] <= min(stream['index_mb'], tree['peak_growth_mb'])
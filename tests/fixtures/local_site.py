@@ -0,0 +1,121 @@
+import collections
+import gzip
+import hashlib
+import threading
+import time
+from email.utils import formatdate
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import pytest
+
+SITE_ROOT = Path(__file__).parent / 'ecb_site'
+ECB_DOMAIN = 'https://www.ecb.europa.eu'
+
+
+class LocalSite:
+    """
+    Локальная копия сайта ECB (`tests/fixtures/ecb_site`), доступная по HTTP.
+    Абсолютные ссылки на ecb.europa.eu в ответах заменяются на адрес локального сервера.
+    """
+
+    def __init__(self, root: Path = SITE_ROOT, latency: float = 0):
+        self.root = root
+        # Задержка каждого ответа (секунды), чтобы приблизить локальный сервер к сети
+        self.latency = latency
+        self.requests: collections.Counter[str] = collections.Counter()
+        self.connections = 0  # Сколько TCP соединений открыли клиенты
+        self.not_modified: collections.Counter[str] = collections.Counter()
+        # Запросы, пришедшие через прокси (по хостам), и заголовок авторизации на прокси последнего из них
+        self.proxied: collections.Counter[str] = collections.Counter()
+        self.proxy_authorization: str | None = None
+        # Время последнего изменения, которое сервер отдает в `Last-Modified`
+        self.modified = formatdate(1737619200, usegmt=True)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler(), bind_and_activate=False)
+        # Очередь соединений больше числа параллельных загрузок, иначе переполнение дает паузы по 1 с
+        self._server.request_queue_size = 64
+        self._server.server_bind()
+        self._server.server_activate()
+        self._server.daemon_threads = True
+        self.domain = f'http://127.0.0.1:{self._server.server_port}'
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self) -> 'LocalSite':
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def url(self, path: str) -> str:
+        return self.domain + path
+
+    def _handler(self):
+        site = self
+
+        class Handler(SimpleHTTPRequestHandler):
+            # Keep-alive соединения, как у сайта ECB
+            protocol_version = 'HTTP/1.1'
+            # Заголовки и тело пишутся отдельно: без этого на keep-alive соединении ответ ждет задержанный ACK
+            disable_nagle_algorithm = True
+
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=str(site.root), **kwargs)
+
+            def setup(self):
+                super().setup()
+                site.connections += 1
+
+            def do_GET(self):
+                target = urlsplit(self.path)
+                if target.scheme:
+                    # Клиент прокси присылает адрес в абсолютной форме, сервер отвечает на него как прокси
+                    site.proxied[target.netloc] += 1
+                    site.proxy_authorization = self.headers.get('Proxy-Authorization')
+                path = target.path
+                site.requests[path] += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                file = Path(self.translate_path(path))
+                if not file.is_file():
+                    self.send_error(404)
+                    return
+                body = file.read_bytes()
+                if file.suffix in ('.html', '.xml'):
+                    body = body.replace(ECB_DOMAIN.encode(), site.domain.encode())
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                # Как в HTTP: если есть `If-None-Match`, `If-Modified-Since` не проверяется
+                if 'If-None-Match' in self.headers:
+                    not_modified = self.headers['If-None-Match'] == etag
+                else:
+                    not_modified = self.headers.get('If-Modified-Since') == site.modified
+                if not_modified:
+                    site.not_modified[path] += 1
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', self.guess_type(str(file)))
+                if file.suffix in ('.html', '.xml') and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', site.modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture(scope="function")
+def fix_local_site() -> LocalSite:
+    site = LocalSite().start()
+    yield site
+    site.stop()
@@ -0,0 +1,35 @@
+from typing import Callable
+
+import pytest
+from s3p_sdk.plugin.types import SOURCE
+from s3p_sdk.types import S3PRefer, S3PPlugin, S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import ECB
+from tests.fixtures.local_site import LocalSite
+
+
+def make_payload(site: LocalSite | None = None, restrictions: S3PPluginRestrictions | None = None, web_driver=None,
+                 overrides: dict | None = None, **params) -> ECB:
+    """
+    Парсер тестового источника `test-refer`.
+
+    :param site: локальный сайт, RSS лента и домен которого используются вместо ecb.europa.eu
+    :param restrictions: ограничения запуска, по умолчанию - без ограничений
+    :param overrides: атрибуты и методы, подменяемые в классе парсера (индекс, загрузка страниц)
+    :param params: параметры запуска парсера
+    """
+    attributes = {'RSS': site.url('/rss/pub.html'), 'DOMAIN': site.domain} if site is not None else {}
+    attributes.update(overrides or {})
+    payload_class = type('LocalECB', (ECB,), attributes) if attributes else ECB
+    return payload_class(
+        refer=S3PRefer(1, 'test-refer', SOURCE, None),
+        plugin=S3PPlugin(1, 'unittests/repo/1', True, None, None, SOURCE, "3.0"),
+        restrictions=restrictions or S3PPluginRestrictions(None, None, None, None),
+        web_driver=web_driver,
+        **params,
+    )
+
+
+@pytest.fixture(scope="function")
+def fix_payload() -> Callable[..., ECB]:
+    return make_payload
@@ -0,0 +1,112 @@
+import datetime
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import ECBArticle, FeedState, PublishingCadence
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+MAX_INTERVAL = datetime.timedelta(hours=24)
+SCHEDULE = {'min_expected': 0.5, 'max_interval_hours': 24}
+
+
+def _http_article(self, url):
+    return ECBArticle(title=None, category=None, published=None, abstract=None, text='text')
+
+
+@pytest.fixture(scope="function")
+def make_payload(fix_payload, fix_local_site, tmp_path):
+    """Парсер в режиме RSS с адаптивным расписанием, состояние в `tmp_path`"""
+
+    def make(schedule: dict = SCHEDULE):
+        return fix_payload(fix_local_site, overrides={'_http_article': _http_article}, use_rss=1, use_http=1,
+                           state_dir=tmp_path, adaptive_schedule=schedule)
+
+    return make
+
+
+def weekly_cadence(weeks: int = 4) -> PublishingCadence:
+    """Публикации по вторникам и четвергам в 14:00"""
+    first = datetime.datetime(2025, 1, 7, 14)
+    published = [first + datetime.timedelta(days=7 * week + day) for week in range(weeks) for day in (0, 2)]
+    return PublishingCadence(published=published)
+
+
+@pytest.mark.payload_set
+class TestPublishingCadence:
+
+    def test_expected(self):
+        cadence = weekly_cadence()
+        # Вторник 14:00-15:00: одна публикация в неделю
+        assert cadence.expected(datetime.datetime(2025, 2, 4, 14), datetime.datetime(2025, 2, 4, 15)) == pytest.approx(1, rel=0.2)
+        assert cadence.expected(datetime.datetime(2025, 2, 4, 14, 30), datetime.datetime(2025, 2, 4, 15)) == pytest.approx(0.5, rel=0.2)
+        assert cadence.expected(datetime.datetime(2025, 2, 5), datetime.datetime(2025, 2, 6)) == 0
+        assert PublishingCadence().expected(datetime.datetime(2025, 2, 5), datetime.datetime(2025, 2, 6)) == 0
+
+    def test_advise(self):
+        """Запуск нужен после часа публикаций или по истечении `max_interval`"""
+        cadence = weekly_cadence()
+        assert cadence.advise(datetime.datetime(2025, 2, 4, 10), 0.5, MAX_INTERVAL).run
+
+        cadence.checked = datetime.datetime(2025, 2, 4, 10)
+        advice = cadence.advise(datetime.datetime(2025, 2, 4, 12), 0.5, MAX_INTERVAL)
+        assert not advice.run
+        assert advice.next_check == datetime.datetime(2025, 2, 4, 15)
+        assert cadence.advise(datetime.datetime(2025, 2, 4, 15), 0.5, MAX_INTERVAL).run
+
+        # Тихий день: следующая проверка не позже `max_interval`
+        cadence.checked = datetime.datetime(2025, 2, 5, 0)
+        assert cadence.advise(datetime.datetime(2025, 2, 5, 12), 0.5, MAX_INTERVAL).next_check == datetime.datetime(2025, 2, 6, 0)
+        assert cadence.advise(datetime.datetime(2025, 2, 6, 0), 0.5, MAX_INTERVAL).run
+
+    def test_observe(self, tmp_path):
+        """Старые даты забываются, состояние переживает запуск"""
+        cadence = weekly_cadence()
+        cadence.observe([datetime.datetime(2025, 2, 4, 14), datetime.datetime(2025, 1, 7, 14)], datetime.datetime(2025, 2, 5), 14)
+        assert cadence.published[0] >= datetime.datetime(2025, 1, 22)
+        assert cadence.published.count(datetime.datetime(2025, 2, 4, 14)) == 1
+        cadence.checked = datetime.datetime(2025, 2, 5)
+        cadence.save(tmp_path / 'cadence.json')
+        assert PublishingCadence.load(tmp_path / 'cadence.json') == cadence
+        assert PublishingCadence.load(tmp_path / 'missing.json') == PublishingCadence()
+
+
+@pytest.mark.payload_set
+class TestAdaptiveSchedule:
+
+    def test_skipped_run(self, make_payload, fix_local_site, tmp_path):
+        """Первый запуск учит даты публикаций ленты, запуск без ожидаемых публикаций не делает запросов"""
+        assert len(make_payload().content()) == 3
+        cadence = PublishingCadence.load(tmp_path / 'test-refer.cadence.json')
+        assert cadence.checked is not None
+
+        requests = sum(fix_local_site.requests.values())
+        assert make_payload().content() == ()
+        assert sum(fix_local_site.requests.values()) == requests
+
+        # Лента давно не проверялась: запуск выполняется и получает 304
+        cadence.checked -= MAX_INTERVAL
+        cadence.save(tmp_path / 'test-refer.cadence.json')
+        assert make_payload().content() == ()
+        assert fix_local_site.not_modified['/rss/pub.html'] == 1
+
+    def test_probe(self, make_payload, fix_local_site, tmp_path):
+        """Проба - один условный запрос ленты, состояние ленты не меняется"""
+        result = make_payload().probe()
+        assert result.modified and result.new
+        assert result.newest == datetime.datetime(2025, 1, 23, 9)
+        assert fix_local_site.requests['/rss/pub.html'] == 1
+        assert not (tmp_path / 'test-refer.feed.json').exists()
+
+        FeedState(published=result.newest, link=result.link).save(tmp_path / 'test-refer.feed.json')
+        result = make_payload().probe()
+        assert result.modified and not result.new
+
+        make_payload(schedule={}).content()
+        assert not make_payload().probe().modified
+        # Каждая проба и запуск - один запрос ленты
+        assert fix_local_site.requests == {'/rss/pub.html': 4}
+
+    def test_needs_state_dir(self, fix_payload):
+        with pytest.raises(ValueError):
+            fix_payload(adaptive_schedule={'min_expected': 1})
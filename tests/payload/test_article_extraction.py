@@ -0,0 +1,106 @@
+import datetime
+import re
+from pathlib import Path
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import parse_article, CircuitOpen, ECBArticle
+from tests.fixtures.payload_factory import fix_payload
+
+SITE = Path(__file__).parent.parent / 'fixtures' / 'ecb_site'
+ARTICLE = SITE / 'pub' / 'economic-bulletin' / 'articles' / '2025' / 'html' / 'ecb.ebart202501_01~1a2b3c4d5e.en.html'
+
+
+@pytest.fixture(scope="module")
+def article() -> ECBArticle:
+    return parse_article(ARTICLE.read_bytes())
+
+
+@pytest.mark.payload_set
+class TestArticleExtraction:
+
+    def test_meta_fields(self, article):
+        """Заголовок, категория и дата публикации извлекаются без браузера"""
+        assert article.title == 'Wage growth and the labour market'
+        assert article.category == 'Economic Bulletin Article'
+        assert article.published == datetime.datetime(2025, 1, 23)
+
+    def test_abstract(self, article):
+        assert article.abstract == ('Wage growth remained strong in 2024 but is expected to moderate.\n'
+                                    'Labour demand is cooling gradually.')
+
+    def test_text(self, article):
+        """Текст секции собирается как `WebElement.text`: без скриптов и комментариев, с footnotes в конце"""
+        assert article.text.startswith('Prepared by Jane Doe and John Roe\n')
+        assert 'Wage growth in the euro area has been elevated since 2022, reflecting compensation for past inflation.[1]' in article.text
+        assert 'tracking' not in article.text
+        assert 'editorial comment' not in article.text
+        assert article.text.endswith('\n\nSee the ECB wage tracker.')
+
+    def test_not_an_article(self):
+        """Страница без `main` и `.section` считается не разобранной (будет использован WebDriver)"""
+        assert parse_article(b'<html><body><div>Access denied</div></body></html>') is None
+        assert parse_article(b'<html><body><main><h1>Maintenance</h1></main></body></html>') is None
+
+
+class PageDriver:
+    """
+    Драйвер, который отдает `main` и `.footnotes` сохраненной страницы и считает обращения к браузеру.
+    Первые `failed_loads` загрузок страницы не завершаются: элементы на ней не находятся
+    """
+
+    def __init__(self, html: str, failed_loads: int = 0):
+        self.html = html
+        self.calls = 0
+        self.loads = 0
+        self.failed_loads = failed_loads
+
+    def get(self, url):
+        self.calls += 1
+        self.loads += 1
+
+    def find_element(self, by, value):
+        from selenium.common.exceptions import NoSuchElementException
+
+        self.calls += 1
+        if self.loads <= self.failed_loads:
+            raise NoSuchElementException(value)
+        return object()
+
+    def execute_script(self, script, *args):
+        self.calls += 1
+        main = re.search(r'<main>.*</main>', self.html, re.S)
+        return [main.group(0) if main else None, None]
+
+
+@pytest.mark.payload_set
+class TestDriverExtraction:
+
+    def test_single_round_trip(self, fix_payload, article):
+        """Поля публикации извлекаются одним вызовом скрипта (плюс загрузка страницы и ожидания)"""
+        driver = PageDriver(ARTICLE.read_text(encoding='utf-8'))
+        assert fix_payload(web_driver=driver)._driver_article('https://ecb.test/article.en.html') == article
+        assert driver.calls == 4
+
+    def test_page_load_is_retried(self, fix_payload, article):
+        """Страница, не загрузившаяся в браузере, загружается повторно по правилам `request_policy`"""
+        driver = PageDriver(ARTICLE.read_text(encoding='utf-8'), failed_loads=1)
+        payload = fix_payload(web_driver=driver, wait_timeouts={'main': 0.2}, request_policy={'backoff': 0.001})
+        assert payload._driver_article('https://ecb.test/article.en.html') == article
+        assert driver.loads == 2
+
+    def test_breaker_sees_page_loads(self, fix_payload):
+        """Страницы, которые так и не загрузились, открывают предохранитель, после чего браузер не используется"""
+        driver = PageDriver(ARTICLE.read_text(encoding='utf-8'), failed_loads=10)
+        payload = fix_payload(web_driver=driver, wait_timeouts={'main': 0.1}, request_policy={'retries': 0, 'breaker': 2})
+        for _ in range(2):
+            with pytest.raises(ValueError):
+                payload._driver_article('https://ecb.test/article.en.html')
+        with pytest.raises(CircuitOpen):
+            payload._driver_article('https://ecb.test/article.en.html')
+        assert driver.loads == 2
+
+    def test_missing_main(self, fix_payload):
+        driver = PageDriver('<html><body><h1>Maintenance</h1></body></html>')
+        with pytest.raises(ValueError):
+            fix_payload(web_driver=driver)._driver_article('https://ecb.test/article.en.html')
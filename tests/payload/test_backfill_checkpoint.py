@@ -0,0 +1,135 @@
+import datetime
+
+import pytest
+from s3p_sdk.exceptions.parser import S3PPluginPayloadError
+from selenium.common.exceptions import WebDriverException
+
+from src.s3p_plugin_parser_ecb.ecb import ECB, ECBArticle, IndexEntry, BackfillCheckpoint
+from tests.fixtures.payload_factory import fix_payload
+
+FIRST_DATE = datetime.datetime(2025, 1, 31)
+
+
+def index(count: int, start: int = 0) -> list[IndexEntry]:
+    return [
+        IndexEntry(f'/pub/{i}.en.html', f'pub {i}', FIRST_DATE - datetime.timedelta(days=i), 'Blog')
+        for i in range(start, start + count)
+    ]
+
+
+def local_index(entries: list[IndexEntry], crash_on: str | None = None, error: type[Exception] = WebDriverException) -> dict:
+    """
+    Подмена индекса и загрузки страниц. Страница `crash_on` не загружается по HTTP,
+    а web driver, к которому парсер переходит за ней, падает с ошибкой `error`
+    """
+
+    def _fragment_entries(self):
+        yield from entries
+
+    def _http_article(self, url):
+        if crash_on is not None and url.endswith(crash_on):
+            return None
+        self.fetched.append(url)
+        return ECBArticle(title=None, category='Blog', published=None, abstract=None, text='text of ' + url)
+
+    def _driver_article(self, url):
+        raise error(f'web driver is dead on {url}')
+
+    return {'fetched': [], '_fragment_entries': _fragment_entries, '_http_article': _http_article, '_driver_article': _driver_article}
+
+
+@pytest.fixture(scope="function")
+def make_payload(fix_payload, tmp_path):
+    """Обход индекса фрагментами с контрольной точкой в `tmp_path`"""
+
+    def make(entries: list[IndexEntry], crash_on: str | None = None, error: type[Exception] = WebDriverException, **overrides):
+        return fix_payload(overrides={**local_index(entries, crash_on, error), **overrides}, use_http=1, use_fragments=1, state_dir=tmp_path, resume_backfill=1)
+
+    return make
+
+
+@pytest.mark.payload_set
+class TestBackfillCheckpoint:
+
+    def test_resume_after_crash(self, make_payload, tmp_path):
+        """Прерванный обход отдает найденные документы, а следующий запуск продолжает с контрольной точки"""
+        entries = index(10)
+        docs = make_payload(entries, crash_on='/pub/4.en.html').content()
+        assert [doc.link for doc in docs] == [entry.link for entry in entries[:4]]
+
+        checkpoint = BackfillCheckpoint.load(tmp_path / 'test-refer.checkpoint.json', 'None..None')
+        assert checkpoint.position == 4
+        assert checkpoint.link == '/pub/3.en.html'
+        assert checkpoint.published == entries[3].published
+
+        payload = make_payload(entries)
+        docs = payload.content()
+        assert [doc.link for doc in docs] == [entry.link for entry in entries[4:]]
+        assert len(payload.fetched) == 6
+        # Завершенный обход удаляет контрольную точку
+        assert not (tmp_path / 'test-refer.checkpoint.json').exists()
+
+    def test_parser_error(self, make_payload, tmp_path):
+        """Ошибка самого парсера не считается прерыванием: контрольная точка сохраняется, но запуск падает"""
+        entries = index(10)
+
+        def _find(self, document):
+            if document.link == '/pub/4.en.html':
+                raise KeyError(document.link)
+            ECB._find(self, document)
+
+        with pytest.raises(S3PPluginPayloadError):
+            make_payload(entries, _find=_find).content()
+        assert BackfillCheckpoint.load(tmp_path / 'test-refer.checkpoint.json', 'None..None').position == 4
+
+        docs = make_payload(entries).content()
+        assert [doc.link for doc in docs] == [entry.link for entry in entries[4:]]
+
+    def test_failed_page_is_retried(self, make_payload, tmp_path):
+        """Страница, которую не удалось разобрать, пропускается, но контрольная точка остается перед ней"""
+        entries = index(10)
+        docs = make_payload(entries, crash_on='/pub/4.en.html', error=ValueError).content()
+        assert len(docs) == 9
+        assert BackfillCheckpoint.load(tmp_path / 'test-refer.checkpoint.json', 'None..None').position == 4
+
+        docs = make_payload(entries).content()
+        assert [doc.link for doc in docs] == [entry.link for entry in entries[4:]]
+        assert not (tmp_path / 'test-refer.checkpoint.json').exists()
+
+    def test_changed_index(self, make_payload, tmp_path):
+        """Если в начало индекса добавлены публикации, обход продолжается после последней обработанной"""
+        entries = index(10)
+        make_payload(entries, crash_on='/pub/4.en.html').content()
+        docs = make_payload(index(2, start=-2) + entries).content()
+        assert [doc.link for doc in docs] == [entry.link for entry in entries[4:]]
+
+    def test_checkpoint_not_in_index(self, make_payload, tmp_path):
+        BackfillCheckpoint('None..None', 3, 'hash', '/pub/missing.en.html').save(tmp_path / 'test-refer.checkpoint.json')
+        docs = make_payload(index(5)).content()
+        assert len(docs) == 5
+
+    def test_other_restrictions(self, make_payload, tmp_path):
+        """Контрольная точка обхода с другими ограничениями по датам не используется"""
+        BackfillCheckpoint('2024-01-01 00:00:00..None', 3, 'hash', '/pub/2.en.html').save(tmp_path / 'test-refer.checkpoint.json')
+        docs = make_payload(index(5)).content()
+        assert len(docs) == 5
+
+    def test_stream_saves_every_document(self, make_payload, tmp_path):
+        """В потоковом режиме контрольная точка сохраняется после каждого документа"""
+        path = tmp_path / 'test-refer.checkpoint.json'
+        positions = []
+
+        def consume(doc):
+            checkpoint = BackfillCheckpoint.load(path, 'None..None')
+            positions.append(checkpoint.position if checkpoint else 0)
+
+        make_payload(index(4)).stream_to(consume)
+        assert positions == [0, 1, 2, 3]
+        assert not path.exists()
+
+    def test_without_state_dir(self, make_payload, tmp_path):
+        """Без `state_dir` страница, которую не удалось загрузить, как и раньше пропускается"""
+        payload = make_payload(index(5), crash_on='/pub/1.en.html')
+        payload._state_dir = None
+        assert len(payload.content()) == 4
+        assert not (tmp_path / 'test-refer.checkpoint.json').exists()
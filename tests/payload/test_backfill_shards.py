@@ -0,0 +1,152 @@
+import datetime
+import threading
+import time
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from s3p_sdk.types import S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import ECBArticle, IndexEntry, BackfillShards
+from tests.fixtures.payload_factory import fix_payload
+
+DAYS = 90  # Публикации с 1 января по 31 марта 2024, по одной в день
+
+
+def fragment(year: int) -> list[IndexEntry]:
+    if year != 2024:
+        return []
+    first = datetime.datetime(2024, 3, 31)
+    return [
+        IndexEntry(f'/pub/{i}.en.html', f'pub {i}', first - datetime.timedelta(days=i), 'Blog')
+        for i in range(DAYS + 1)
+    ]
+
+
+def local_fragments(delay: float = 0, crash_on: str | None = None, error: type[Exception] = WebDriverException) -> dict:
+    """
+    Подмена фрагментов индекса и загрузки страниц. Страница `crash_on` не загружается по HTTP,
+    а web driver, к которому парсер переходит за ней, падает с ошибкой `error`
+    """
+
+    def _index_fragment(self, year):
+        return fragment(year)
+
+    def _http_article(self, url):
+        if crash_on is not None and url.endswith(crash_on):
+            return None
+        time.sleep(delay)
+        return ECBArticle(title=None, category='Blog', published=None, abstract=None, text='text of ' + url)
+
+    def _driver_article(self, url):
+        raise error(f'web driver is dead on {url}')
+
+    return {'_index_fragment': _index_fragment, '_http_article': _http_article, '_driver_article': _driver_article}
+
+
+@pytest.fixture(scope="function")
+def make_payload(fix_payload, tmp_path):
+    """Рабочий обхода архива за первый квартал 2024 с частями в `tmp_path`"""
+
+    def make(restrictions=None, delay: float = 0, crash_on: str | None = None, error: type[Exception] = WebDriverException):
+        return fix_payload(restrictions=restrictions, overrides=local_fragments(delay, crash_on, error), use_http=1, concurrency=4,
+                           state_dir=tmp_path, backfill={'ranges': [['2024-01-01', '2024-03-31']]})
+
+    return make
+
+
+@pytest.mark.payload_set
+class TestBackfillShards:
+
+    def test_split(self):
+        shards = BackfillShards.split([(datetime.date(2023, 12, 15), datetime.date(2024, 2, 1)),
+                                       (datetime.date(2024, 1, 10), datetime.date(2024, 1, 20))])
+        assert [shard.key for shard in shards] == ['2024-02', '2024-01', '2023-12']
+        assert shards[0].end == datetime.date(2024, 2, 29)
+        assert [shard.key for shard in BackfillShards.split([(datetime.date(2023, 5, 1), datetime.date(2024, 1, 1))], 'year')] == ['2024', '2023']
+        with pytest.raises(ValueError):
+            BackfillShards.split([], 'week')
+
+    def test_lease(self, tmp_path):
+        """Часть арендует один рабочий, пока аренда не истекла"""
+        first = BackfillShards(tmp_path / 'shards.sqlite', lease_seconds=60)
+        second = BackfillShards(tmp_path / 'shards.sqlite', lease_seconds=60)
+        first.plan(BackfillShards.split([(datetime.date(2024, 1, 1), datetime.date(2024, 2, 29))]))
+        assert first.acquire().key == '2024-02'
+        assert second.acquire().key == '2024-01'
+        assert second.acquire() is None
+        assert first.save({'2024-02': (5, False)}) == 0
+        # Аренда освобождается при закрытии, прогресс части сохраняется
+        first.close()
+        shard = second.acquire()
+        assert (shard.key, shard.position) == ('2024-02', 5)
+        assert first.owner != second.owner
+        second.close()
+
+    def test_expired_lease(self, tmp_path):
+        first = BackfillShards(tmp_path / 'shards.sqlite', lease_seconds=0)
+        first.plan(BackfillShards.split([(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))]))
+        assert first.acquire().key == '2024-01'
+        second = BackfillShards(tmp_path / 'shards.sqlite')
+        assert second.acquire().key == '2024-01'
+        # Прогресс рабочего, потерявшего аренду, не сохраняется
+        assert first.save({'2024-01': (3, True)}) == 1
+        assert second.pending() == 1
+
+    def test_workers_split_the_archive(self, make_payload, tmp_path):
+        """Параллельные рабочие делят части между собой, каждая публикация выдается один раз"""
+        results = []
+
+        def work():
+            results.append(make_payload(delay=0.005).content())
+
+        workers = [threading.Thread(target=work) for _ in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        links = [doc.link for docs in results for doc in docs]
+        assert len(links) == len(set(links)) == DAYS + 1
+        assert all(docs for docs in results)
+        assert make_payload().content() == ()
+
+    def test_restrictions(self, make_payload, tmp_path):
+        """Части вне ограничений по датам не арендуются, публикации проходят через ограничения `_find`"""
+        restrictions = S3PPluginRestrictions(None, None, datetime.datetime(2024, 2, 20), datetime.datetime(2024, 3, 5))
+        docs = make_payload(restrictions).content()
+        assert len(docs) == 15
+        assert min(doc.published for doc in docs) == datetime.datetime(2024, 2, 20)
+
+    def test_maximum_materials(self, make_payload, tmp_path):
+        """Запуск, остановленный на `maximum_materials`, сохраняет прогресс части, следующий продолжает с него"""
+        restrictions = S3PPluginRestrictions(10, None, None, None)
+        first = make_payload(restrictions).content()
+        second = make_payload().content()
+        assert len(first) == 10
+        assert [doc.link for doc in first + second] == [entry.link for entry in fragment(2024)]
+
+    def test_interrupted_shard(self, make_payload, tmp_path):
+        docs = make_payload(crash_on='/pub/35.en.html').content()
+        assert len(docs) == 35
+        docs += make_payload().content()
+        assert [doc.link for doc in docs] == [entry.link for entry in fragment(2024)]
+
+    def test_failed_page_keeps_shard_pending(self, make_payload, tmp_path):
+        """Часть с неудачной страницей не отмечается завершенной, следующий запуск продолжает ее с этой страницы"""
+        docs = make_payload(crash_on='/pub/35.en.html', error=ValueError).content()
+        assert len(docs) == DAYS
+        shards = BackfillShards(tmp_path / 'test-refer.shards.sqlite')
+        assert shards.pending() == 1
+        shards.close()
+
+        docs = make_payload().content()
+        # Часть за февраль повторяется с неудачной страницы, остальные не загружаются
+        assert docs[0].link == '/pub/35.en.html'
+        assert all(datetime.date(2024, 2, 1) <= doc.published.date() <= datetime.date(2024, 2, 29) for doc in docs)
+        shards = BackfillShards(tmp_path / 'test-refer.shards.sqlite')
+        assert shards.pending() == 0
+        shards.close()
+
+    def test_needs_state_dir(self, fix_payload):
+        with pytest.raises(ValueError):
+            fix_payload(backfill={'period': 'year'})
@@ -0,0 +1,56 @@
+import importlib.util
+import inspect
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import DocumentExtractor
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+PDF = '/pub/pdf/scpwps/ecb.wp3001~9f8e7d6c5b.en.pdf'
+
+
+@pytest.mark.payload_set
+class TestDocumentExtraction:
+
+    def test_pdf_text(self, fix_payload, fix_local_site):
+        """Текст PDF документа заполняется, порядок документов из RSS сохраняется"""
+        docs = fix_payload(fix_local_site, use_rss=1, use_http=1, concurrency=4, extract_documents=1).content()
+        assert [doc.link for doc in docs] == [
+            fix_local_site.url('/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'),
+            fix_local_site.url(PDF),
+            fix_local_site.url('/pub/financial-stability/fsr/html/ecb.fsr202411~5a6b7c8d9e.en.html'),
+        ]
+        assert docs[1].text.startswith('Working Paper Series No 3001\nMonetary policy transmission in a low-rate environment')
+        assert 'We study how policy rate changes pass through to bank lending rates.' in docs[1].text
+
+    def test_size_limit(self, fix_payload, fix_local_site):
+        """Документ больше `max_bytes` не загружается, публикация сохраняется без текста"""
+        docs = fix_payload(fix_local_site, use_rss=1, use_http=1, extract_documents=1, document_limits={'max_bytes': 100}).content()
+        assert docs[1].link == fix_local_site.url(PDF)
+        assert docs[1].text is None
+
+    def test_text_limit(self, fix_local_site):
+        text = DocumentExtractor({'max_chars': 20}).extract(fix_local_site.url(PDF))
+        assert text == 'Working Paper Series'
+
+    def test_not_pdf(self, fix_local_site):
+        assert DocumentExtractor().extract(fix_local_site.url('/rss/pub.html')) is None
+
+    def test_timeout_kills_workers(self, fix_local_site):
+        """Процессы пула, превысившие таймаут, завершаются, следующий документ обрабатывается новым пулом"""
+        extractor = DocumentExtractor({'timeout': 0})
+        assert extractor.extract(fix_local_site.url(PDF)) is None
+        assert extractor._pool is None
+        extractor.limits['timeout'] = 60
+        assert extractor.extract(fix_local_site.url(PDF)).startswith('Working Paper Series')
+        extractor.shutdown()
+
+    def test_module_loaded_by_path(self, fix_local_site):
+        """Платформа загружает файл плагина по пути: процессы пула не импортируют модуль плагина"""
+        spec = importlib.util.spec_from_file_location('ecb_loaded_by_path', inspect.getfile(DocumentExtractor))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        extractor = module.DocumentExtractor()
+        assert extractor.extract(fix_local_site.url(PDF)).startswith('Working Paper Series')
+        extractor.shutdown()
@@ -0,0 +1,148 @@
+import datetime
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from s3p_sdk.types import S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import ECBArticle, FeedState, FeedReader, rss_date
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+FSR = 'ecb.fsr202411~5a6b7c8d9e.en.html'
+
+
+def pages(*failing: str) -> dict:
+    """Подмена загрузки страниц публикаций. Страницы `failing` не загружаются"""
+
+    def _http_article(self, url):
+        if url.endswith(failing):
+            return None
+        return ECBArticle(title=None, category=None, published=None, abstract=None, text='text')
+
+    return {'_http_article': _http_article}
+
+
+@pytest.fixture(scope="function")
+def run_payload(fix_payload, fix_local_site, tmp_path):
+    """Запуск в режиме RSS с состоянием в `tmp_path`"""
+
+    def run(restrictions=None, failing: tuple[str, ...] = (), **params) -> tuple:
+        return fix_payload(fix_local_site, restrictions, overrides=pages(*failing),
+                           use_rss=1, use_http=1, state_dir=tmp_path, **params).content()
+
+    return run
+
+
+@pytest.mark.payload_set
+class TestFeedState:
+
+    def test_not_modified_feed(self, run_payload, fix_local_site, tmp_path):
+        """Повторный запуск отправляет валидаторы и завершается на ответе 304"""
+        docs = run_payload()
+        assert len(docs) == 3
+
+        state = FeedState.load(tmp_path / 'test-refer.feed.json')
+        assert state.etag and state.modified
+        assert state.published == datetime.datetime(2025, 1, 23, 9)
+        assert state.link.endswith('ecb.ebart202501_01~1a2b3c4d5e.en.html')
+
+        assert run_payload() == ()
+        assert fix_local_site.not_modified['/rss/pub.html'] == 1
+
+    def test_cursor(self, run_payload, fix_local_site, tmp_path):
+        """Без валидаторов лента скачивается, но публикации не новее курсора пропускаются"""
+        FeedState(
+            published=datetime.datetime(2025, 1, 22, 14, 30),
+            link=fix_local_site.url('/pub/pdf/scpwps/ecb.wp3001~9f8e7d6c5b.en.pdf'),
+        ).save(tmp_path / 'test-refer.feed.json')
+        docs = run_payload()
+        assert [doc.title for doc in docs] == ['Wage growth and the labour market']
+
+        FeedState(published=datetime.datetime(2025, 1, 24)).save(tmp_path / 'test-refer.feed.json')
+        assert run_payload() == ()
+
+    def test_limited_run_keeps_cursor(self, run_payload, fix_local_site, tmp_path):
+        """Запуск, остановленный `maximum_materials`, не сдвигает курсор: следующий запуск выдает остальные записи"""
+        docs = run_payload(S3PPluginRestrictions(1, None, None, None), seen_ttl_days=30)
+        assert len(docs) == 1
+        assert not (tmp_path / 'test-refer.feed.json').exists()
+
+        docs = run_payload(seen_ttl_days=30)
+        assert [doc.title for doc in docs] == ['Monetary policy transmission in a low-rate environment',
+                                               'Financial Stability Review, November 2024']
+        assert FeedState.load(tmp_path / 'test-refer.feed.json').published == datetime.datetime(2025, 1, 23, 9)
+
+    def test_failed_entries_are_retried(self, run_payload, fix_local_site, tmp_path):
+        """Записи, страницы которых не загрузились или которые новее `to_date`, читаются следующим запуском"""
+        docs = run_payload(failing=(FSR,))
+        assert len(docs) == 2
+        assert run_payload()[-1].title == 'Financial Stability Review, November 2024'
+
+        (tmp_path / 'test-refer.feed.json').unlink()
+        docs = run_payload(S3PPluginRestrictions(None, None, None, datetime.datetime(2025, 1, 23)))
+        assert len(docs) == 2
+        assert len(run_payload()) == 3
+
+    def test_state_is_not_saved_on_error(self, run_payload, fix_local_site, tmp_path):
+        fix_local_site.stop()
+        with pytest.raises(Exception):
+            run_payload(request_policy={'retries': 0})
+        assert not (tmp_path / 'test-refer.feed.json').exists()
+
+    def test_concurrent_save(self, tmp_path):
+        """Запуски с общим `state_dir` сохраняют один файл одновременно, не мешая друг другу"""
+        path = tmp_path / 'test-refer.feed.json'
+        states = [FeedState(etag=f'"{i}"', published=datetime.datetime(2025, 1, 1 + i), link=f'/pub/{i}.en.html') for i in range(8)]
+
+        def save(state: FeedState) -> None:
+            for _ in range(50):
+                state.save(path)
+
+        with ThreadPoolExecutor(len(states)) as executor:
+            list(executor.map(save, states))
+        assert FeedState.load(path) in states
+        assert [file.name for file in tmp_path.iterdir()] == [path.name]
+
+    def test_state_dir(self, fix_payload, tmp_path, monkeypatch):
+        """Относительный `state_dir` хранится в каталоге состояния пользователя, временный каталог - только без него"""
+        monkeypatch.setenv('XDG_STATE_HOME', str(tmp_path / 'state'))
+        assert fix_payload(state_dir='ecb')._state_dir == tmp_path / 'state' / 'ecb'
+        assert fix_payload(state_dir=str(tmp_path / 'ecb'))._state_dir == tmp_path / 'ecb'
+
+        monkeypatch.delenv('XDG_STATE_HOME')
+        monkeypatch.setenv('HOME', str(tmp_path))
+        assert fix_payload(state_dir='ecb')._state_dir == tmp_path / '.local' / 'state' / 'ecb'
+        monkeypatch.setenv('HOME', str(tmp_path / 'missing'))
+        assert fix_payload(state_dir='ecb')._state_dir == Path(tempfile.gettempdir()) / 'ecb'
+
+
+@pytest.mark.payload_set
+class TestFeedReader:
+
+    def test_rss_date(self):
+        """Формат RFC 822 разбирается напрямую, остальные форматы - запасным парсером"""
+        assert rss_date('Thu, 23 Jan 2025 09:00:00 +0100') == datetime.datetime(2025, 1, 23, 9)
+        assert rss_date('Thu, 23 Jan 2025 09:00:00 GMT') == datetime.datetime(2025, 1, 23, 9)
+        assert rss_date('2025-01-23T09:00:00+01:00') == datetime.datetime(2025, 1, 23, 9)
+        assert rss_date('not a date') is None
+
+    def test_items(self, fix_local_site):
+        feed = FeedReader(fix_local_site.url('/rss/pub.html'))
+        assert feed.open()
+        assert feed.etag and feed.modified and feed.size > 0
+        items = list(feed.items())
+        assert [item.published for item in items] == [
+            datetime.datetime(2025, 1, 23, 9), datetime.datetime(2025, 1, 22, 14, 30), datetime.datetime(2024, 11, 20, 10),
+        ]
+        assert items[0].summary == 'An analysis of recent wage developments in the euro area.'
+        assert items[2].summary is None
+        assert items[2].link == fix_local_site.url('/pub/financial-stability/fsr/html/ecb.fsr202411~5a6b7c8d9e.en.html')
+
+    def test_not_modified(self, fix_local_site):
+        feed = FeedReader(fix_local_site.url('/rss/pub.html'))
+        feed.open()
+        feed.close()
+        assert not FeedReader(fix_local_site.url('/rss/pub.html'), etag=feed.etag).open()
+
@@ -0,0 +1,164 @@
+import asyncio
+import contextlib
+import datetime
+import threading
+import time
+
+import pytest
+from s3p_sdk.types import S3PDocument, S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import ECBArticle, ordered_map, async_ordered_map, run_coroutine
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+
+def local_feed(pubs: list[S3PDocument], delays: dict[str, float]) -> dict:
+    """Подмена RSS ленты и загрузки страниц на локальные данные"""
+
+    def _latest_pubs(self):
+        yield from pubs
+
+    def _http_article(self, url):
+        time.sleep(delays.get(url, 0))
+        self.fetched.append(url)
+        return ECBArticle(title=None, category='Blog', published=None, abstract=None, text='text of ' + url)
+
+    return {'fetched': [], '_latest_pubs': _latest_pubs, '_http_article': _http_article}
+
+
+def feed(count: int) -> list[S3PDocument]:
+    now = datetime.datetime(2025, 1, 31)
+    return [
+        S3PDocument(None, f'pub {i}', None, None, f'https://ecb.test/pub/{i}.en.html', None, None,
+                    now - datetime.timedelta(days=i), None)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.payload_set
+class TestOrderedMap:
+
+    def test_keeps_order(self):
+        """Результаты приходят в порядке входных данных, даже если первые задачи выполняются дольше"""
+        delays = [0.05, 0.01, 0.03, 0, 0.02]
+        results = [future.result() for _, future in ordered_map(lambda i: time.sleep(delays[i]) or i, range(5), 3)]
+        assert results == [0, 1, 2, 3, 4]
+
+    def test_bounded_window(self):
+        """Одновременно выполняется не больше `limit` задач"""
+        running = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def work(i):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.01)
+            with lock:
+                running -= 1
+            return i
+
+        assert [f.result() for _, f in ordered_map(work, range(20), 4)] == list(range(20))
+        assert peak <= 4
+
+    def test_lazy_consumption(self):
+        """Входной итератор читается не дальше окна"""
+        pulled = []
+
+        def items():
+            for i in range(100):
+                pulled.append(i)
+                yield i
+
+        pages = ordered_map(lambda i: i, items(), 3)
+        next(pages)
+        pages.close()
+        assert len(pulled) == 3
+
+
+@pytest.mark.payload_set
+class TestConcurrentRSS:
+
+    def test_find_in_feed_order(self, fix_payload):
+        pubs = feed(10)
+        delays = {pub.link: 0.02 * (10 - i) for i, pub in enumerate(pubs)}
+        payload = fix_payload(overrides=local_feed(pubs, delays), use_rss=1, use_http=1, concurrency=4)
+        docs = payload.content()
+        assert [doc.link for doc in docs] == [pub.link for pub in pubs]
+        assert all(doc.text == 'text of ' + doc.link for doc in docs)
+
+    def test_from_date_stop(self, fix_payload):
+        """Парсер останавливается на первом документе старше FROM_DATE, оставшаяся загрузка отменяется"""
+        pubs = feed(40)
+        boundary = pubs[5].published - datetime.timedelta(hours=1)
+        payload = fix_payload(restrictions=S3PPluginRestrictions(None, None, boundary, None),
+                              overrides=local_feed(pubs, {pub.link: 0.01 for pub in pubs}), use_rss=1, use_http=1, concurrency=4)
+        docs = payload.content()
+        assert [doc.link for doc in docs] == [pub.link for pub in pubs[:6]]
+        time.sleep(0.1)
+        assert len(payload.fetched) < len(pubs)
+
+
+@pytest.mark.payload_set
+class TestAsyncOrderedMap:
+
+    def test_keeps_order(self):
+        delays = [0.05, 0.01, 0.03, 0, 0.02]
+
+        async def work(i):
+            await asyncio.sleep(delays[i])
+            return i
+
+        async def collect():
+            return [result async for _, result in async_ordered_map(work, range(5), 3)]
+
+        assert asyncio.run(collect()) == [0, 1, 2, 3, 4]
+
+    def test_close_cancels_tasks(self):
+        """Закрытие генератора отменяет запланированные задачи"""
+        cancelled = []
+
+        async def work(i):
+            try:
+                await asyncio.sleep(0.01 if i == 0 else 10)
+            except asyncio.CancelledError:
+                cancelled.append(i)
+                raise
+            return i
+
+        async def first():
+            pages = async_ordered_map(work, range(100), 4)
+            async with contextlib.aclosing(pages):
+                async for _, result in pages:
+                    return result
+
+        assert asyncio.run(first()) == 0
+        assert sorted(cancelled) == [1, 2, 3]
+
+    def test_run_inside_event_loop(self):
+        """`content()` остается синхронным, даже если его вызвали из потока с работающим циклом событий"""
+        async def caller():
+            return run_coroutine(asyncio.sleep(0, 'done'))
+
+        assert asyncio.run(caller()) == 'done'
+
+
+@pytest.mark.payload_set
+class TestAsyncRSS:
+
+    def test_feed_order(self, fix_payload, fix_local_site):
+        docs = fix_payload(fix_local_site, use_rss=1, use_http=1, concurrency=4, use_async=1).content()
+        assert [doc.title for doc in docs] == [
+            'Wage growth and the labour market',
+            'Monetary policy transmission in a low-rate environment',
+            'Financial Stability Review, November 2024',
+        ]
+        assert docs[0].text.startswith('Prepared by Jane Doe and John Roe')
+        assert docs[0].other == {'category': 'Economic Bulletin Article'}
+
+    def test_from_date_stop(self, fix_payload, fix_local_site):
+        restrictions = S3PPluginRestrictions(None, None, datetime.datetime(2025, 1, 1), None)
+        docs = fix_payload(fix_local_site, restrictions, use_rss=1, use_http=1, concurrency=4, use_async=1).content()
+        assert len(docs) == 2
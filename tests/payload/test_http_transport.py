@@ -0,0 +1,116 @@
+import base64
+import gzip
+import json
+import socket
+import urllib.error
+import zlib
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import HttpTransport, http_get
+from tests.fixtures.local_site import fix_local_site, LocalSite, SITE_ROOT, ECB_DOMAIN
+from tests.fixtures.payload_factory import fix_payload
+
+ARTICLE = '/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'
+
+
+@pytest.mark.payload_set
+class TestHttpTransport:
+
+    def test_keep_alive(self, fix_local_site):
+        """Запросы к одному хосту идут через одно соединение"""
+        transport = HttpTransport()
+        for _ in range(3):
+            http_get(fix_local_site.url(ARTICLE), transport=transport)
+        assert transport.stats() == {'requests': 3, 'connections': 1, 'reused': 2}
+        assert fix_local_site.connections == 1
+        transport.close()
+
+    def test_compressed_response(self, fix_local_site):
+        transport = HttpTransport()
+        expected = (SITE_ROOT / ARTICLE.lstrip('/')).read_bytes().replace(ECB_DOMAIN.encode(), fix_local_site.domain.encode())
+        with transport.get(fix_local_site.url(ARTICLE)) as response:
+            assert response.headers['Content-Encoding'] == 'gzip'
+            chunks = []
+            while chunk := response.read(1024):
+                chunks.append(chunk)
+        assert b''.join(chunks) == expected
+        transport.close()
+
+    def test_decoder(self):
+        data = b'<rss>' + b'item ' * 1000 + b'</rss>'
+        for encoding, body in (('gzip', gzip.compress(data)), ('deflate', zlib.compress(data)), (None, data)):
+            decode, flush = HttpTransport.decoder(encoding)
+            assert b''.join(decode(body[i:i + 100]) for i in range(0, len(body), 100)) + flush() == data
+
+    def test_errors_follow_urllib(self, fix_local_site):
+        """Статус не 2xx - `HTTPError`. После ответа 304 соединение остается в пуле"""
+        transport = HttpTransport()
+        with pytest.raises(urllib.error.HTTPError) as error:
+            transport.get(fix_local_site.url('/rss/pub.html'), {'If-Modified-Since': fix_local_site.modified})
+        assert error.value.code == 304
+        http_get(fix_local_site.url(ARTICLE), transport=transport)
+        assert transport.stats()['connections'] == 1
+        with pytest.raises(urllib.error.HTTPError) as error:
+            transport.get(fix_local_site.url('/missing.html'))
+        assert error.value.code == 404
+        transport.close()
+
+    def test_pool_size(self, fix_local_site):
+        """Лишние свободные соединения закрываются"""
+        transport = HttpTransport({'pool_size': 1})
+        responses = [transport.get(fix_local_site.url('/rss/pub.html')) for _ in range(3)]
+        for response in responses:
+            response.read()
+            response.close()
+        assert sum(len(idle) for idle in transport._idle.values()) == 1
+        transport.close()
+
+    def test_address_fallback(self, fix_local_site, monkeypatch):
+        """Если первый адрес хоста не отвечает, соединение открывается по следующему, а DNS запрашивается один раз"""
+        resolve = socket.getaddrinfo
+        lookups = []
+
+        def getaddrinfo(host, port, *args, **kwargs):
+            if host != 'ecb.test':
+                return resolve(host, port, *args, **kwargs)
+            lookups.append(host)
+            # Сервер слушает только 127.0.0.1, на 127.0.0.2 соединение отклоняется
+            return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port)) for address in ('127.0.0.2', '127.0.0.1')]
+
+        monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+        transport = HttpTransport({'pool_size': 0})
+        url = f'http://ecb.test:{fix_local_site.domain.rsplit(":", 1)[1]}/rss/pub.html'
+        for _ in range(2):
+            http_get(url, transport=transport)
+        assert fix_local_site.requests['/rss/pub.html'] == 2
+        assert lookups == ['ecb.test']
+        transport.close()
+
+    def test_proxy(self, fix_local_site, monkeypatch):
+        """Прокси из окружения используется как в `urllib`, хосты из `no_proxy` загружаются напрямую"""
+        monkeypatch.setenv('http_proxy', fix_local_site.domain.replace('http://', 'http://user:secret@'))
+        monkeypatch.setenv('no_proxy', 'localhost')
+        transport = HttpTransport()
+        http_get('http://ecb.test/rss/pub.html', transport=transport)
+        assert fix_local_site.proxied == {'ecb.test': 1}
+        assert fix_local_site.proxy_authorization == 'Basic ' + base64.b64encode(b'user:secret').decode()
+        transport.close()
+
+        monkeypatch.setenv('no_proxy', '127.0.0.1')
+        transport = HttpTransport()
+        http_get(fix_local_site.url('/rss/pub.html'), transport=transport)
+        assert fix_local_site.proxied == {'ecb.test': 1}
+        assert fix_local_site.requests['/rss/pub.html'] == 2
+        transport.close()
+
+    def test_run_reuses_connections(self, fix_payload, fix_local_site: LocalSite, tmp_path):
+        """Лента и страницы запуска загружаются через общий пул соединений"""
+        metrics = tmp_path / 'metrics.json'
+        docs = fix_payload(fix_local_site, use_rss=1, use_http=1, extract_documents=1, metrics_path=str(metrics)).content()
+        assert len(docs) == 3
+        summary = json.loads(metrics.read_text())
+        # Лента читается потоком, пока загружаются страницы, а PDF скачивается параллельно, поэтому соединений несколько
+        assert summary['http']['requests'] == 4
+        assert summary['http']['connections'] == fix_local_site.connections
+        assert summary['http']['reused'] == 4 - summary['http']['connections'] > 0
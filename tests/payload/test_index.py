@@ -0,0 +1,105 @@
+import datetime
+import re
+from pathlib import Path
+
+import pytest
+from s3p_sdk.types import S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import IndexParser, IndexEntry
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+INDEX = Path(__file__).parent.parent / 'fixtures' / 'ecb_site' / 'pub' / 'pubbydate' / 'html' / 'index.en.html'
+
+
+def index_children() -> list[str]:
+    """Записи индекса (`dt` и `dd`) в том виде, в котором их возвращает `ECB.INDEX_CHUNK_SCRIPT`"""
+    html = INDEX.read_text(encoding='utf-8')
+    return re.findall(r'<(?:dt|dd)\b.*?</(?:dt|dd)>', html, re.S)
+
+
+@pytest.mark.payload_set
+class TestIndexParser:
+
+    def test_entries(self):
+        entries = IndexParser().feed(''.join(index_children()))
+        assert [entry.link for entry in entries] == [
+            '/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html',
+            '/pub/pdf/scpwps/ecb.wp3001~9f8e7d6c5b.en.pdf',
+            '/press/key/date/2025/html/ecb.sp250122~0a1b2c3d4e.en.html',
+        ]
+        assert entries[0].title == 'Wage growth and the labour market'
+        assert entries[0].type == 'Economic Bulletin Article'
+        assert entries[0].published == datetime.datetime(2025, 1, 23)
+
+    def test_chunks(self):
+        """Дата из `dt` переносится на записи следующей порции индекса"""
+        children = index_children()
+        parser = IndexParser()
+        first = parser.feed(''.join(children[:4]))
+        second = parser.feed(''.join(children[4:]))
+        assert [entry.type for entry in first] == ['Economic Bulletin Article', 'Working Paper Series']
+        assert [entry.type for entry in second] == ['Speech']
+        assert second[0].published == datetime.datetime(2025, 1, 22)
+
+
+    def test_record_fields(self):
+        """Поля берутся так же, как из дерева: ссылка из `.title` первого `div`, текст без скриптов, дата из текста `dt`"""
+        entries = IndexParser().feed(
+            '<dt><div class="date">5 March 2024</div></dt>'
+            '<dd><div><div class="category"> Press &amp; <b>speech</b> </div>'
+            '<div class="title"><a href="/a.en.html">Rates<script>track()</script> &amp; <i>inflation</i></a></div></div></dd>'
+            '<dd><div class="x"></div><div><div class="title"><a href="/skipped.en.html">Not in the first div</a></div></div></dd>'
+            '<dd><div><div class="title"><a>No link</a></div></div></dd>'
+            '<dd><div><div class="title"><a href="/b.en.html"></a></div></div>'
+        )
+        assert entries == [
+            IndexEntry('/a.en.html', 'Rates & inflation', datetime.datetime(2024, 3, 5), 'Press & speech'),
+            IndexEntry('/b.en.html', None, datetime.datetime(2024, 3, 5), None),
+        ]
+
+
+@pytest.mark.payload_set
+class TestIndexRestrictions:
+
+    def test_maximum_materials(self, fix_payload):
+        """Прокрутка индекса останавливается, когда кандидатов хватает на `maximum_materials`"""
+        payload = fix_payload(restrictions=S3PPluginRestrictions(3, None, None, None))
+        assert not payload._index_covers_restrictions(2, datetime.datetime(2025, 1, 1))
+        assert payload._index_covers_restrictions(3, datetime.datetime(2025, 1, 1))
+
+        payload._rejected = 1
+        assert not payload._index_covers_restrictions(3, datetime.datetime(2025, 1, 1))
+
+    def test_from_date(self, fix_payload):
+        payload = fix_payload(restrictions=S3PPluginRestrictions(None, None, datetime.datetime(2025, 1, 10), None))
+        assert not payload._index_covers_restrictions(100, datetime.datetime(2025, 1, 10))
+        assert payload._index_covers_restrictions(1, datetime.datetime(2025, 1, 9))
+
+    def test_candidates(self, fix_payload):
+        """Кандидаты - только web-страницы, не новее `to_date`"""
+        payload = fix_payload(restrictions=S3PPluginRestrictions(None, None, None, datetime.datetime(2025, 1, 10)))
+        assert payload._is_candidate(IndexEntry('/pub/a.en.html', None, datetime.datetime(2025, 1, 9), None))
+        assert payload._is_candidate(IndexEntry('/pub/a.en.html', None, None, None))
+        assert not payload._is_candidate(IndexEntry('/pub/a.en.html', None, datetime.datetime(2025, 1, 11), None))
+        assert not payload._is_candidate(IndexEntry('/pub/a.en.pdf', None, datetime.datetime(2025, 1, 9), None))
+
+
+@pytest.mark.payload_set
+class TestIndexFragments:
+
+    def test_documents(self, fix_payload, fix_local_site):
+        """Индекс собирается из годовых фрагментов без браузера, от новых публикаций к старым"""
+        docs = fix_payload(fix_local_site, use_http=1, use_fragments=1, years=[2024, 2025]).content()
+        assert [doc.title for doc in docs] == ['Wage growth and the labour market', 'Financial Stability Review, November 2024']
+        assert docs[0].link == '/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'
+        assert docs[1].published == datetime.datetime(2024, 11, 20)
+        assert fix_local_site.requests['/pub/pubbydate/2025/html/index_include.en.html'] == 1
+        assert fix_local_site.requests['/pub/pubbydate/2024/html/index_include.en.html'] == 1
+
+    def test_years_in_restrictions(self, fix_payload, fix_local_site):
+        """Фрагменты за годы вне ограничений по датам не загружаются"""
+        restrictions = S3PPluginRestrictions(None, None, datetime.datetime(2025, 1, 1), None)
+        docs = fix_payload(fix_local_site, restrictions, use_http=1, use_fragments=1, years=[2024, 2025]).content()
+        assert [doc.title for doc in docs] == ['Wage growth and the labour market']
+        assert fix_local_site.requests['/pub/pubbydate/2024/html/index_include.en.html'] == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import ECBWaits, LeanPageLoad
+
+
+class CDPDriver:
+    """Chromium драйвер, который записывает команды DevTools"""
+
+    def __init__(self):
+        self.commands = []
+        self.stale = False
+        self.current_window_handle = 'main'
+        self.window_handles = ['main']
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.commands.append((cmd, params))
+        if cmd == 'Page.navigate':
+            # Новый документ загружается без пометки
+            self.stale = False
+        return {}
+
+    def execute_script(self, script, *args):
+        if 'window.__ecbStale = true' in script:
+            self.stale = True
+            return None
+        return not self.stale
+
+
+@pytest.mark.payload_set
+class TestLeanPageLoad:
+
+    def test_navigation(self):
+        driver = CDPDriver()
+        waits = ECBWaits(driver)
+        lean = LeanPageLoad(driver, waits)
+        assert lean.supported
+
+        lean.get('https://ecb.test/a.en.html')
+        lean.get('https://ecb.test/b.en.html')
+        names = [cmd for cmd, _ in driver.commands]
+        # Блокировка запросов включается один раз, переход не ждет событие `load`
+        assert names == ['Network.enable', 'Network.setBlockedURLs', 'Page.navigate', 'Page.navigate']
+        assert '*.css' in driver.commands[1][1]['urls'] and '*.woff2' in driver.commands[1][1]['urls']
+        assert len(waits.timings['dom']) == 2
+
+    def test_restore(self):
+        """После запуска блокировка снимается: WebDriver общий для плагинов"""
+        driver = CDPDriver()
+        lean = LeanPageLoad(driver, ECBWaits(driver))
+        lean.disable()
+        assert driver.commands == []
+
+        lean.get('https://ecb.test/a.en.html')
+        lean.disable()
+        assert driver.commands[-2:] == [('Network.setBlockedURLs', {'urls': []}), ('Network.disable', {})]
+
+    def test_not_chromium(self):
+        assert not LeanPageLoad(object(), None).supported
@@ -0,0 +1,116 @@
+import time
+import urllib.error
+from email.message import Message
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import ECB, CircuitOpen, RequestGovernor, RunStats
+from tests.fixtures.local_site import fix_local_site, LocalSite
+from tests.fixtures.payload_factory import fix_payload
+
+URL = 'https://www.ecb.europa.eu/pub/article.en.html'
+
+
+def http_error(code: int, retry_after: str | None = None) -> urllib.error.HTTPError:
+    headers = Message()
+    if retry_after is not None:
+        headers['Retry-After'] = retry_after
+    return urllib.error.HTTPError(URL, code, 'error', headers, None)
+
+
+class Flaky:
+    """Запрос, который сначала завершается ошибками из `errors`, потом успешно"""
+
+    def __init__(self, *errors: Exception):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'body'
+
+
+@pytest.mark.payload_set
+class TestRequestGovernor:
+
+    def make(self, **policy) -> RequestGovernor:
+        return RequestGovernor({'backoff': 0.001, **policy}, RunStats())
+
+    def test_retry(self):
+        """Ошибки сети, 429 и 5xx повторяются с паузой"""
+        governor = self.make()
+        request = Flaky(http_error(503), urllib.error.URLError('reset'), TimeoutError())
+        assert governor.call(URL, request) == 'body'
+        assert request.calls == 4
+
+    def test_not_retryable(self):
+        governor = self.make()
+        request = Flaky(http_error(404))
+        with pytest.raises(urllib.error.HTTPError):
+            governor.call(URL, request)
+        assert request.calls == 1
+
+    def test_retry_after(self):
+        """Пауза из Retry-After соблюдается, а слишком долгая пауза не ждется"""
+        governor = self.make(max_backoff=1)
+        request = Flaky(http_error(429, '0.05'))
+        started = time.monotonic()
+        assert governor.call(URL, request) == 'body'
+        assert time.monotonic() - started >= 0.05
+
+        request = Flaky(http_error(429, '3600'))
+        with pytest.raises(urllib.error.HTTPError):
+            governor.call(URL, request)
+        assert request.calls == 1
+
+    def test_rate_limit(self):
+        """Запросы к одному хосту ограничены по частоте, другие хосты не ждут"""
+        governor = self.make(rate=50, burst=1)
+        started = time.monotonic()
+        for _ in range(6):
+            governor.call(URL, lambda: None)
+        assert time.monotonic() - started >= 0.09
+
+        started = time.monotonic()
+        governor.call('https://other.test/', lambda: None)
+        assert time.monotonic() - started < 0.02
+
+    def test_circuit_breaker(self):
+        """После `breaker` неудачных запросов подряд запросы больше не выполняются"""
+        governor = self.make(retries=0, breaker=2)
+        with pytest.raises(ConnectionError):
+            governor.call(URL, Flaky(ConnectionResetError()))
+        governor.call(URL, lambda: None)
+        for _ in range(2):
+            with pytest.raises(ConnectionResetError):
+                governor.call(URL, Flaky(ConnectionResetError()))
+
+        request = Flaky()
+        with pytest.raises(CircuitOpen):
+            governor.call(URL, request)
+        assert request.calls == 0
+
+
+@pytest.mark.payload_set
+class TestDegradedSite:
+
+    def test_run_is_stopped(self, fix_payload, fix_local_site: LocalSite, tmp_path):
+        """
+        Когда сайт деградировал, запуск останавливается: найденные документы отдаются, состояние не сохраняется.
+        Переход к браузеру за страницей тоже проверяет предохранитель
+        """
+
+        def _http_get(self, url, stage, headers=None):
+            if 'fsr' in url:
+                raise ConnectionResetError(url)
+            return ECB._http_get(self, url, stage, headers)
+
+        docs = fix_payload(fix_local_site, overrides={'_http_get': _http_get}, use_rss=1, use_http=1, state_dir=tmp_path,
+                           request_policy={'retries': 0, 'breaker': 1}).content()
+        assert [doc.link for doc in docs] == [
+            fix_local_site.url('/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'),
+            fix_local_site.url('/pub/pdf/scpwps/ecb.wp3001~9f8e7d6c5b.en.pdf'),
+        ]
+        assert not (tmp_path / 'test-refer.feed.json').exists()
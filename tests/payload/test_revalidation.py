@@ -0,0 +1,101 @@
+import datetime
+import shutil
+
+import pytest
+from s3p_sdk.types import S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import DocumentRevision, DocumentRevisions
+from tests.fixtures.local_site import LocalSite, SITE_ROOT
+from tests.fixtures.payload_factory import fix_payload
+
+ARTICLE = '/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'
+# Публикации локального сайта старые, поэтому окно проверки большое
+REVALIDATE = {'window_days': 100000, 'max_links': 10}
+
+
+@pytest.fixture(scope="function")
+def site(tmp_path) -> LocalSite:
+    """Копия локального сайта, страницы которой тест может изменить"""
+    root = tmp_path / 'site'
+    shutil.copytree(SITE_ROOT, root)
+    site = LocalSite(root).start()
+    yield site
+    site.stop()
+
+
+@pytest.fixture(scope="function")
+def run_payload(fix_payload, site, tmp_path):
+    """Запуск в режиме RSS с повторной проверкой страниц, состояние в `tmp_path / 'state'`"""
+
+    def run(restrictions=None, **params) -> tuple:
+        return fix_payload(site, restrictions, use_rss=1, use_http=1, state_dir=tmp_path / 'state', revalidate=REVALIDATE,
+                           **params).content()
+
+    return run
+
+
+@pytest.mark.payload_set
+class TestRevalidation:
+
+    def test_unchanged_pages(self, run_payload, site, tmp_path):
+        """Выданные страницы запоминаются, повторный запуск проверяет их условными запросами"""
+        docs = run_payload()
+        assert len(docs) == 3
+        store = DocumentRevisions(tmp_path / 'state' / 'test-refer.revisions.sqlite')
+        records = store.recent(datetime.datetime(2000, 1, 1), 10)
+        store.close()
+        # PDF документы не проверяются
+        assert len(records) == 2
+        assert all(record.etag and record.modified and record.length and record.revision == 0 for record in records)
+
+        assert run_payload() == ()
+        assert site.not_modified[ARTICLE] == 1
+
+    def test_async_pages(self, run_payload, site):
+        """Асинхронный режим запоминает валидаторы страниц, первая же проверка условная"""
+        assert len(run_payload(concurrency=4, use_async=1)) == 3
+        assert run_payload() == ()
+        assert site.not_modified[ARTICLE] == 1
+
+    def test_revised_page(self, run_payload, site, tmp_path):
+        """Измененная страница выдается повторно с номером редакции"""
+        first = {doc.link: doc for doc in run_payload()}
+        page = site.root / ARTICLE.lstrip('/')
+        page.write_text(page.read_text(encoding='utf-8').replace('This article reviews recent developments.', 'Corrigendum: revised figure.'),
+                        encoding='utf-8')
+
+        docs = run_payload()
+        assert [doc.link for doc in docs] == [site.url(ARTICLE) + '#revision-1']
+        assert docs[0].other['revision'] == 1
+        assert 'Corrigendum' in docs[0].text
+        # Для `SaveOnlyNewDocuments` редакция - новый документ
+        assert docs[0].hash != first[site.url(ARTICLE)].hash
+
+        # Новая редакция запомнена и больше не выдается
+        assert run_payload() == ()
+
+    def test_restrictions(self, run_payload, site, tmp_path):
+        """Измененные страницы проходят через ограничения `_find`"""
+        run_payload()
+        page = site.root / ARTICLE.lstrip('/')
+        page.write_text(page.read_text(encoding='utf-8').replace('This article reviews recent developments.', 'Corrigendum.'), encoding='utf-8')
+        restrictions = S3PPluginRestrictions(None, None, datetime.datetime(2025, 1, 24), None)
+        assert run_payload(restrictions) == ()
+
+    def test_fingerprint(self):
+        assert DocumentRevisions.fingerprint('a  b\n c') == DocumentRevisions.fingerprint('a b c')
+        assert DocumentRevisions.fingerprint('a b c') != DocumentRevisions.fingerprint('a b d')
+
+    def test_window(self, tmp_path):
+        """Проверяются страницы окна, сначала те, что дольше не проверялись; старые удаляются"""
+        store = DocumentRevisions(tmp_path / 'revisions.sqlite')
+        store.save([DocumentRevision(f'/pub/{i}.en.html', None, datetime.datetime(2025, 1, i + 1), str(i)) for i in range(5)])
+        store.commit()
+        assert [record.link for record in store.recent(datetime.datetime(2025, 1, 3), 2)] == ['/pub/4.en.html', '/pub/3.en.html']
+        assert store.evict(datetime.datetime(2025, 1, 3)) == 2
+        assert len(store.recent(datetime.datetime(2000, 1, 1), 10)) == 3
+        store.close()
+
+    def test_needs_state_dir(self, fix_payload):
+        with pytest.raises(ValueError):
+            fix_payload(revalidate=REVALIDATE)
@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from s3p_sdk.types import S3PPluginRestrictions
+
+from src.s3p_plugin_parser_ecb.ecb import RunStats
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+
+@pytest.mark.payload_set
+class TestRunStats:
+
+    def test_json_summary(self, fix_payload, fix_local_site, tmp_path):
+        """Итог запуска: счетчики публикаций, скачанные байты и время этапов"""
+        payload = fix_payload(fix_local_site, use_rss=1, use_http=1, extract_documents=1, metrics_path=str(tmp_path / 'ecb.json'))
+        docs = payload.content()
+        assert len(docs) == 3
+
+        summary = json.loads((tmp_path / 'ecb.json').read_text())
+        assert summary['refer'] == 'test-refer' and summary['outcome'] == 'finished'
+        assert summary['found'] == 3
+        assert summary['counters'] == {
+            'fetched': 3, 'skipped': 0, 'failed': 0, 'out_of_restriction': 0, 'bytes': summary['counters']['bytes'],
+        }
+        assert summary['counters']['bytes'] > 0
+        assert {'feed', 'http', 'parse', 'find', 'document', 'pdf'} <= set(summary['stages'])
+        assert summary['stages']['http']['count'] == 2
+        assert summary['wait'] > 0 and summary['work'] > 0
+
+    def test_prometheus_textfile(self, fix_payload, fix_local_site, tmp_path):
+        """Суффикс `.prom` - textfile для Prometheus, публикации вне ограничений считаются отдельно"""
+        fix_payload(fix_local_site, S3PPluginRestrictions(1, None, None, None), use_rss=1, use_http=1,
+                    metrics_path=str(tmp_path / 'ecb.prom')).content()
+
+        lines = (tmp_path / 'ecb.prom').read_text().splitlines()
+        assert '# TYPE ecb_parser_documents gauge' in lines
+        assert 'ecb_parser_documents{refer="test-refer",outcome="finished",status="fetched"} 1' in lines
+        assert any(line.startswith('ecb_parser_stage_seconds{refer="test-refer",outcome="finished",stage="http",quantile="0.95"} ')
+                   for line in lines)
+
+    def test_label_escaping(self):
+        text = RunStats.prometheus(RunStats().summary(), {'refer': 'a "b"\\c'})
+        assert 'ecb_parser_run_duration_seconds{refer="a \\"b\\"\\\\c"} ' in text
@@ -0,0 +1,40 @@
+import time
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import SeenLinks
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+ARTICLE = '/pub/economic-bulletin/articles/2025/html/ecb.ebart202501_01~1a2b3c4d5e.en.html'
+
+
+@pytest.mark.payload_set
+class TestSeenLinks:
+
+    def test_normalized_key(self):
+        assert SeenLinks.key('https://WWW.ECB.europa.eu/pub/a.en.html#top') == SeenLinks.key('https://www.ecb.europa.eu/pub/a.en.html')
+        assert SeenLinks.key('https://www.ecb.europa.eu/pub/a.en.html') != SeenLinks.key('https://www.ecb.europa.eu/pub/b.en.html')
+
+    def test_eviction(self, tmp_path):
+        seen = SeenLinks(tmp_path / 'seen.sqlite', ttl_days=1, max_entries=2)
+        seen.add(['https://ecb.test/1', 'https://ecb.test/2'])
+        seen._db.execute('UPDATE seen SET seen = ? WHERE key = ?', (time.time() - 2 * 86400, SeenLinks.key('https://ecb.test/1')))
+        seen.add(['https://ecb.test/3', 'https://ecb.test/4'])
+        assert seen.compact() == 2
+        assert 'https://ecb.test/1' not in seen
+        assert sum(link in seen for link in ('https://ecb.test/2', 'https://ecb.test/3', 'https://ecb.test/4')) == 2
+
+    def test_known_publications_are_not_fetched(self, fix_payload, fix_local_site, tmp_path):
+        """Публикации, сохраненные прошлым запуском, пропускаются до загрузки страницы"""
+
+        def run_payload() -> tuple:
+            return fix_payload(fix_local_site, use_rss=1, use_http=1, state_dir=tmp_path, seen_ttl_days=30).content()
+
+        assert len(run_payload()) == 3
+        assert fix_local_site.requests[ARTICLE] == 1
+
+        # Без курсора RSS ленты все публикации ленты снова становятся кандидатами
+        (tmp_path / 'test-refer.feed.json').unlink()
+        assert run_payload() == ()
+        assert fix_local_site.requests[ARTICLE] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import DocumentStream
+from tests.fixtures.local_site import fix_local_site
+from tests.fixtures.payload_factory import fix_payload
+
+TITLES = [
+    'Wage growth and the labour market',
+    'Monetary policy transmission in a low-rate environment',
+    'Financial Stability Review, November 2024',
+]
+# Режим RSS с извлечением текста PDF, потребитель получает документы по одному
+STREAM = {'use_rss': 1, 'use_http': 1, 'extract_documents': 1, 'stream_buffer': 1}
+
+
+@pytest.mark.payload_set
+class TestDocumentStream:
+
+    def test_callback(self, fix_payload, fix_local_site):
+        """Документы передаются в callback по порядку, документ ждет извлечения текста PDF"""
+        emitted = []
+        payload = fix_payload(fix_local_site, **STREAM)
+        assert payload.stream_to(lambda doc: emitted.append((doc.title, doc.text is not None))) == 3
+        assert emitted == [(title, True) for title in TITLES]
+        # Парсер не хранит выданные документы
+        assert isinstance(payload._parsed_document, DocumentStream)
+        assert payload._parsed_document.links[0].endswith('ecb.ebart202501_01~1a2b3c4d5e.en.html')
+
+    def test_generator(self, fix_payload, fix_local_site, tmp_path):
+        docs = list(fix_payload(fix_local_site, state_dir=tmp_path, **STREAM).stream())
+        assert [doc.title for doc in docs] == TITLES
+        assert docs[1].text.startswith('Working Paper Series No 3001')
+        assert (tmp_path / 'test-refer.feed.json').exists()
+
+    def test_closed_by_consumer(self, fix_payload, fix_local_site, tmp_path):
+        """Закрытие генератора останавливает парсер, состояние запуска не сохраняется"""
+        stream = fix_payload(fix_local_site, state_dir=tmp_path, **STREAM).stream()
+        assert next(stream).title == TITLES[0]
+        stream.close()
+        assert not (tmp_path / 'test-refer.feed.json').exists()
+
+    def test_error(self, fix_payload, fix_local_site):
+        fix_local_site.stop()
+        with pytest.raises(Exception):
+            list(fix_payload(fix_local_site, request_policy={'retries': 0}, **STREAM).stream())
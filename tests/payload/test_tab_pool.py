@@ -0,0 +1,120 @@
+import itertools
+import time
+
+import pytest
+
+from src.s3p_plugin_parser_ecb.ecb import CircuitOpen, ECBArticle, ECBWaits, RequestGovernor, TabPool
+
+
+class TabsDriver:
+    """Драйвер с вкладками: страница во вкладке считается загруженной, если переход был начат"""
+
+    def __init__(self, broken: set[str] = frozenset()):
+        self._ids = itertools.count(1)
+        self.tabs = {'origin': None}
+        self.current_window_handle = 'origin'
+        self.broken = broken
+        self.switch_to = self
+        self.peak_loading = 0
+
+    # switch_to
+    def new_window(self, kind):
+        handle = f'tab-{next(self._ids)}'
+        self.tabs[handle] = None
+        self.current_window_handle = handle
+
+    def window(self, handle):
+        assert handle in self.tabs, f'{handle} is closed'
+        self.current_window_handle = handle
+
+    @property
+    def window_handles(self):
+        return list(self.tabs)
+
+    def close(self):
+        del self.tabs[self.current_window_handle]
+
+    def execute_script(self, script, *args):
+        if 'window.location.href' in script:
+            self.tabs[self.current_window_handle] = args[0]
+            self.peak_loading = max(self.peak_loading, sum(url is not None for url in self.tabs.values()))
+            return None
+        # Документ загружен, если во вкладке начат переход на рабочую страницу
+        url = self.tabs[self.current_window_handle]
+        return url is not None and url not in self.broken
+
+    def find_element(self, by, value):
+        return object()
+
+    def get(self, url):
+        self.tabs[self.current_window_handle] = url
+
+
+def read(driver: TabsDriver):
+    def reader(url: str) -> ECBArticle:
+        assert driver.tabs[driver.current_window_handle] == url
+        driver.tabs[driver.current_window_handle] = None
+        return ECBArticle(title=url, category=None, published=None, abstract=None, text='text')
+    return reader
+
+
+@pytest.mark.payload_set
+class TestTabPool:
+
+    def test_order_and_parallel_loading(self):
+        driver = TabsDriver()
+        pool = TabPool(driver, ECBWaits(driver), size=3)
+        urls = [f'https://ecb.test/{i}.en.html' for i in range(10)] + ['https://ecb.test/doc.en.pdf']
+        results = list(pool.map(urls, lambda url: url, read(driver)))
+
+        assert [item for item, _ in results] == urls
+        assert [article.title for _, article in results[:-1]] == urls[:-1]
+        assert results[-1][1] is None
+        # Страницы загружаются одновременно в трех вкладках
+        assert driver.peak_loading == 3
+        # После работы вкладки пула закрыты, активна исходная вкладка
+        assert driver.window_handles == ['origin'] and driver.current_window_handle == 'origin'
+
+    def test_recycle(self):
+        """Вкладка, в которой страница не загрузилась, заменяется новой"""
+        driver = TabsDriver(broken={'https://ecb.test/1.en.html'})
+        pool = TabPool(driver, ECBWaits(driver, {'dom': 0.2}), size=2)
+        urls = [f'https://ecb.test/{i}.en.html' for i in range(4)]
+        results = dict(pool.map(urls, lambda url: url, read(driver)))
+
+        assert results['https://ecb.test/1.en.html'] is None
+        assert all(results[url] is not None for url in urls if url != 'https://ecb.test/1.en.html')
+        assert pool.recycled == 1
+        assert driver.window_handles == ['origin']
+
+    def test_governor(self):
+        """Загрузки во вкладках ограничены по частоте, а неудачные открывают предохранитель"""
+        driver = TabsDriver()
+        pool = TabPool(driver, ECBWaits(driver), size=3, governor=RequestGovernor({'rate': 50, 'burst': 1}))
+        started = time.monotonic()
+        list(pool.map([f'https://ecb.test/{i}.en.html' for i in range(6)], lambda url: url, read(driver)))
+        assert time.monotonic() - started >= 0.09
+
+        driver = TabsDriver(broken={'https://ecb.test/0.en.html'})
+        pool = TabPool(driver, ECBWaits(driver, {'dom': 0.2}), size=1, governor=RequestGovernor({'retries': 0, 'breaker': 1}))
+        with pytest.raises(CircuitOpen):
+            list(pool.map([f'https://ecb.test/{i}.en.html' for i in range(3)], lambda url: url, read(driver)))
+        assert driver.window_handles == ['origin']
+
+    def test_fallback_after_failed_page(self):
+        """Неудачная страница загружается повторно в исходной вкладке, не затирая загрузку следующей страницы в пуле"""
+        driver = TabsDriver(broken={'https://ecb.test/1.en.html'})
+        pool = TabPool(driver, ECBWaits(driver, {'dom': 0.2}), size=2)
+        urls = [f'https://ecb.test/{i}.en.html' for i in range(5)]
+        reader = read(driver)
+        titles = []
+        for url, article in pool.map(urls, lambda url: url, reader):
+            if article is None:
+                # Как `ECB._driver_article`: переход в текущей вкладке и чтение страницы
+                assert driver.current_window_handle == 'origin'
+                driver.get(url)
+                article = reader(url)
+            titles.append(article.title)
+
+        assert titles == urls
+        assert driver.window_handles == ['origin']
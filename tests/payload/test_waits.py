@@ -0,0 +1,44 @@
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+
+from src.s3p_plugin_parser_ecb.ecb import ECBWaits
+
+
+class FakeDriver:
+    """Драйвер, в котором элементы появляются через заданное время, а индекс растет по расписанию"""
+
+    def __init__(self, appear_after: float = 0, sizes: list[int] = ()):
+        self._started = time.monotonic()
+        self._appear_after = appear_after
+        self._sizes = list(sizes)
+
+    def find_element(self, by, value):
+        if time.monotonic() - self._started < self._appear_after:
+            raise NoSuchElementException(value)
+        return object()
+
+    def execute_script(self, script, *args):
+        return self._sizes.pop(0) if len(self._sizes) > 1 else self._sizes[0]
+
+
+@pytest.mark.payload_set
+class TestWaits:
+
+    def test_returns_when_ready(self):
+        """Ожидание заканчивается сразу после появления элемента, а не по фиксированной паузе"""
+        waits = ECBWaits(FakeDriver(appear_after=0.2))
+        assert waits.section() is not None
+        assert 0.2 <= waits.timings['section'][0] < 1
+
+    def test_timeout(self):
+        waits = ECBWaits(FakeDriver(appear_after=10), {'main': 0.3})
+        assert waits.main() is None
+        assert waits.summary()['main']['count'] == 1
+        assert waits.timings['main'][0] >= 0.3
+
+    def test_index_growth(self):
+        waits = ECBWaits(FakeDriver(sizes=[10, 10, 10, 25]), {'lazy_load': 1})
+        assert waits.growth(None, 10) == 25
+        assert waits.growth(None, 25) is None